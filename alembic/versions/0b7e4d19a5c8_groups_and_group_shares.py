@@ -0,0 +1,60 @@
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = '0b7e4d19a5c8'
+down_revision: Union[str, Sequence[str], None] = 'f2c6a9d4e317'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.create_table('user_group',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_group_id'), 'user_group', ['id'], unique=False)
+    op.create_index(op.f('ix_user_group_owner_id'), 'user_group', ['owner_id'], unique=False)
+    op.create_table('group_membership',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['user_group.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'user_id')
+    )
+    op.create_index('ix_group_membership_user_id_group_id', 'group_membership', ['user_id', 'group_id'], unique=False)
+    op.create_table('document_group_share',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('permission', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['user_group.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_id', 'group_id', name='uq_document_group_share_document_id_group_id')
+    )
+    op.create_index(op.f('ix_document_group_share_id'), 'document_group_share', ['id'], unique=False)
+    op.create_index('ix_document_group_share_group_id_document_id', 'document_group_share', ['group_id', 'document_id'], unique=False)
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_document_group_share_group_id_document_id', table_name='document_group_share')
+    op.drop_index(op.f('ix_document_group_share_id'), table_name='document_group_share')
+    op.drop_table('document_group_share')
+    op.drop_index('ix_group_membership_user_id_group_id', table_name='group_membership')
+    op.drop_table('group_membership')
+    op.drop_index(op.f('ix_user_group_owner_id'), table_name='user_group')
+    op.drop_index(op.f('ix_user_group_id'), table_name='user_group')
+    op.drop_table('user_group')
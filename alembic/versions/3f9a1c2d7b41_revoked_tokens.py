@@ -0,0 +1,31 @@
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = '3f9a1c2d7b41'
+down_revision: Union[str, Sequence[str], None] = '6ddbfbf510d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.create_table('revoked_token',
+    sa.Column('jti', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_revoked_token_expires_at'), 'revoked_token', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_revoked_token_created_at'), 'revoked_token', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+
+    op.drop_index(op.f('ix_revoked_token_created_at'), table_name='revoked_token')
+    op.drop_index(op.f('ix_revoked_token_expires_at'), table_name='revoked_token')
+    op.drop_table('revoked_token')
@@ -0,0 +1,39 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = '9d3e6b2a1f70'
+down_revision: Union[str, Sequence[str], None] = '0b7e4d19a5c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FOREIGN_KEYS = [
+    ('document_owner_id_fkey', 'document', 'user', 'owner_id'),
+    ('document_share_document_id_fkey', 'document_share', 'document', 'document_id'),
+    ('document_share_user_id_fkey', 'document_share', 'user', 'user_id'),
+    ('document_access_document_id_fkey', 'document_access', 'document', 'document_id'),
+    ('document_access_user_id_fkey', 'document_access', 'user', 'user_id'),
+    ('user_group_owner_id_fkey', 'user_group', 'user', 'owner_id'),
+    ('group_membership_group_id_fkey', 'group_membership', 'user_group', 'group_id'),
+    ('group_membership_user_id_fkey', 'group_membership', 'user', 'user_id'),
+    ('document_group_share_document_id_fkey', 'document_group_share', 'document', 'document_id'),
+    ('document_group_share_group_id_fkey', 'document_group_share', 'user_group', 'group_id'),
+]
+
+
+def upgrade() -> None:
+
+    for name, source, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_='foreignkey')
+        op.create_foreign_key(name, source, referent, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+
+    for name, source, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_='foreignkey')
+        op.create_foreign_key(name, source, referent, [column], ['id'])
@@ -0,0 +1,34 @@
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision: str = 'a81c5e0f4d29'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2d7b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.add_column('document', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_document_search_vector', 'document', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_document_search_vector', table_name='document', postgresql_using='gin')
+    op.drop_column('document', 'search_vector')
@@ -0,0 +1,27 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = 'b6f1d8c3a254'
+down_revision: Union[str, Sequence[str], None] = '9d3e6b2a1f70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.add_column('document', sa.Column('content_digest', sa.String(length=64), nullable=True))
+    op.add_column('document', sa.Column('content_size', sa.BigInteger(), nullable=True))
+    op.add_column('document', sa.Column('content_type', sa.String(), nullable=True))
+    op.add_column('document', sa.Column('content_filename', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+
+    op.drop_column('document', 'content_filename')
+    op.drop_column('document', 'content_type')
+    op.drop_column('document', 'content_size')
+    op.drop_column('document', 'content_digest')
@@ -0,0 +1,34 @@
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision: str = 'c47d2b9e8a10'
+down_revision: Union[str, Sequence[str], None] = 'a81c5e0f4d29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.alter_column('document', 'tags',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=True,
+               postgresql_using='tags::jsonb')
+    op.execute("UPDATE document SET tags = NULL WHERE jsonb_typeof(tags) = 'null'")
+    op.create_index('ix_document_tags', 'document', ['tags'], unique=False, postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_document_tags', table_name='document', postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'})
+    op.alter_column('document', 'tags',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='tags::json')
@@ -0,0 +1,23 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = 'd3a7c5e91b06'
+down_revision: Union[str, Sequence[str], None] = 'b6f1d8c3a254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.add_column('user', sa.Column('deletion_requested_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_user_deletion_requested_at'), 'user', ['deletion_requested_at'], unique=False)
+
+
+def downgrade() -> None:
+
+    op.drop_index(op.f('ix_user_deletion_requested_at'), table_name='user')
+    op.drop_column('user', 'deletion_requested_at')
@@ -0,0 +1,32 @@
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = 'e5b8f1a3c962'
+down_revision: Union[str, Sequence[str], None] = 'c47d2b9e8a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.create_index('ix_document_owner_id_created_at_id', 'document', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_document_created_at_id', 'document', ['created_at', 'id'], unique=False)
+    op.execute(
+        "DELETE FROM document_share a USING document_share b "
+        "WHERE a.document_id = b.document_id AND a.user_id = b.user_id AND a.id > b.id"
+    )
+    op.create_unique_constraint('uq_document_share_document_id_user_id', 'document_share', ['document_id', 'user_id'])
+    op.create_index('ix_document_share_user_id_document_id', 'document_share', ['user_id', 'document_id'], unique=False)
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_document_share_user_id_document_id', table_name='document_share')
+    op.drop_constraint('uq_document_share_document_id_user_id', 'document_share', type_='unique')
+    op.drop_index('ix_document_created_at_id', table_name='document')
+    op.drop_index('ix_document_owner_id_created_at_id', table_name='document')
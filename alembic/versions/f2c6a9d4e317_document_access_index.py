@@ -0,0 +1,43 @@
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision: str = 'f2c6a9d4e317'
+down_revision: Union[str, Sequence[str], None] = 'e5b8f1a3c962'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.create_table('document_access',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('permission', sa.SmallInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'document_id')
+    )
+    op.create_index('ix_document_access_user_id_created_at', 'document_access', ['user_id', 'created_at', 'document_id'], unique=False)
+    op.create_index('ix_document_access_document_id', 'document_access', ['document_id'], unique=False)
+    op.execute(
+        "INSERT INTO document_access (user_id, document_id, permission, created_at) "
+        "SELECT owner_id, id, 3, created_at FROM document "
+        "UNION ALL "
+        "SELECT s.user_id, s.document_id, max(CASE WHEN s.permission = 'write' THEN 2 ELSE 1 END), d.created_at "
+        "FROM document_share s JOIN document d ON d.id = s.document_id "
+        "WHERE s.user_id <> d.owner_id "
+        "GROUP BY s.user_id, s.document_id, d.created_at"
+    )
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_document_access_document_id', table_name='document_access')
+    op.drop_index('ix_document_access_user_id_created_at', table_name='document_access')
+    op.drop_table('document_access')
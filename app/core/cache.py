@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from app.core import invalidation, metrics
+from app.core.config import settings
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._on_set(key, value)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._data):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, value = self._data.pop(key)
+        self._on_remove(key, value)
+
+    def _on_set(self, key: Hashable, value: Any) -> None:
+        pass
+
+    def _on_remove(self, key: Hashable, value: Any) -> None:
+        pass
+
+
+class PrincipalCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def _on_set(self, key: Hashable, value: Any) -> None:
+        _, user = value
+        self._tokens_by_user.setdefault(user.id, set()).add(key)
+
+    def _on_remove(self, key: Hashable, value: Any) -> None:
+        _, user = value
+        tokens = self._tokens_by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._tokens_by_user[user.id]
+
+
+class ResponseCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float, max_bytes: int):
+        super().__init__(maxsize, ttl)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+
+    def generation(self, scope: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(scope, 0)
+
+    def bump(self, scope: Hashable) -> None:
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+
+    def set(self, key: Hashable, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            super().set(key, value, ttl)
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self.bump_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+    def _on_set(self, key: Hashable, value: bytes) -> None:
+        self.bytes += len(value)
+
+    def _on_remove(self, key: Hashable, value: bytes) -> None:
+        self.bytes -= len(value)
+
+
+def register_cache_metrics(caches: Dict[str, TTLCache]) -> None:
+    def collect(read, kinds=TTLCache):
+        return lambda: [((name,), read(cache)) for name, cache in caches.items() if isinstance(cache, kinds)]
+
+    metrics.Gauge("cache_entries", "Entries currently cached.", ["cache"], collect=collect(len))
+    metrics.Gauge("cache_hits", "Cache lookups that found a live entry.", ["cache"], collect=collect(lambda c: c.hits))
+    metrics.Gauge("cache_misses", "Cache lookups that found nothing or an expired entry.", ["cache"], collect=collect(lambda c: c.misses))
+    metrics.Gauge("cache_evictions", "Entries evicted to stay within size limits.", ["cache"], collect=collect(lambda c: c.evictions))
+    metrics.Gauge(
+        "cache_bytes", "Bytes held by response caches.", ["cache"],
+        collect=collect(lambda c: c.bytes, ResponseCache),
+    )
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+invalidation.register(
+    "user",
+    lambda data: principal_cache.invalidate_user(data["id"]),
+    principal_cache.clear,
+)
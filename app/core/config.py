@@ -1,11 +1,58 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Document Manager"
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    REVOCATION_REFRESH_SECONDS: int = 5
+
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+
+    SQL_ECHO: bool = False
+    SQL_STATEMENT_HEADER: bool = False
+    SLOW_QUERY_SECONDS: float = 0.5
+
+    METRICS_MULTIPROCESS_DIR: Optional[str] = None
+    METRICS_FLUSH_SECONDS: int = 5
+
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    DOCUMENT_CACHE_MAX_SIZE: int = 10000
+    DOCUMENT_CACHE_TTL_SECONDS: int = 60
+    PERMISSION_CACHE_MAX_SIZE: int = 50000
+    PERMISSION_CACHE_TTL_SECONDS: int = 60
+    SEARCH_CACHE_MAX_SIZE: int = 10000
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SEARCH_CACHE_TTL_SECONDS: int = 30
+    SEARCH_MAX_LIMIT: int = 100
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+    CACHE_INVALIDATION_HEALTH_SECONDS: int = 5
+
+    BATCH_MAX_ITEMS: int = 500
+    EXPORT_BATCH_SIZE: int = 1000
+    ACCOUNT_PURGE_BATCH_SIZE: int = 1000
+    ACCOUNT_PURGE_RETRY_SECONDS: int = 300
+
+    STORAGE_BACKEND: str = "local"
+    STORAGE_ROOT: str = "storage"
+    STORAGE_BUCKET: str = "documents"
+    UPLOAD_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    PREVIEW_SIZE: int = 256
+    PREVIEW_WORKERS: int = 2  # 0 disables preview generation
+    PREVIEW_MAX_PENDING: int = 32
+    PREVIEW_FAILED_MAX_SIZE: int = 10000
+    PREVIEW_FAILED_TTL_SECONDS: int = 3600
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4  # 0 hashes inline on the event loop
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     POSTGRES_SERVER: str="localhost"
     POSTGRES_USER: str="postgres"
@@ -13,6 +60,9 @@ class Settings(BaseSettings):
     POSTGRES_DB: str="Fastapi_db"
     POSTGRES_PORT: str = "5432"
     DATABASE_URL: Optional[str] = None
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_RETRY_SECONDS: int = 30
+    READ_YOUR_WRITES_SECONDS: int = 5
 
     @property
     def async_database_url(self) -> str:
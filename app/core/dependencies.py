@@ -1,3 +1,4 @@
+import time
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -7,7 +8,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core import security
+from app.core.cache import principal_cache
 from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.db.replicas import read_router
 from app.db.session import get_db
 from app.users import models, schemas
 
@@ -15,26 +19,58 @@ reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db),
-    token: str = Depends(reusable_oauth2)
-) -> models.User:
+def decode_token_payload(token: str, token_type: str = security.ACCESS_TOKEN_TYPE) -> schemas.TokenPayload:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
+        token_data = schemas.TokenPayload(**security.decode_token(token))
+        if (token_data.type or security.ACCESS_TOKEN_TYPE) != token_type:
+            raise jwt.JWTError("Unexpected token type")
+        if revocation_list.is_revoked(token_data.jti):
+            raise jwt.JWTError("Token has been revoked")
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    return token_data
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(reusable_oauth2)
+) -> schemas.User:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        token_data, user = cached
+        if not revocation_list.is_revoked(token_data.jti):
+            read_router.bind_user(user.id)
+            return user
+        principal_cache.pop(token)
+
+    token_data = decode_token_payload(token)
     
     result = await db.execute(select(models.User).filter(models.User.id == token_data.sub))
-    user = result.scalars().first()
+    db_user = result.scalars().first()
     
-    if not user:
+    if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    if not db_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+
+    user = schemas.User.model_validate(db_user)
+    expires_in = token_data.exp - time.time() if token_data.exp else None
+    principal_cache.set(token, (token_data, user), ttl=expires_in)
+    read_router.bind_user(user.id)
     return user
+
+async def get_read_db(
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    # `db` is the request's primary session, already resolved for get_current_user.
+    # A session only checks out a connection on first use, so requests routed to
+    # a replica never take a primary connection.
+    session = await read_router.open_session(current_user.id)
+    if session is None:
+        yield db
+        return
+    async with session:
+        yield session
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import List, Optional
+
+_VERSION_FORMAT = "%Y%m%d%H%M%S%f"
+
+
+def make_etag(id: int, version: datetime) -> str:
+    return f'"{id}-{version.strftime(_VERSION_FORMAT)}"'
+
+
+def make_content_etag(digest: str) -> str:
+    return f'"{digest}"'
+
+
+def parse_etags(header: str) -> List[str]:
+    return [tag for tag in (tag.strip() for tag in header.split(",")) if tag]
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    tags = [tag[2:] if tag.startswith("W/") else tag for tag in parse_etags(header)]
+    return "*" in tags or etag in tags
+
+
+def parse_versions(header: str, id: int) -> Optional[List[datetime]]:
+    # If-Match uses strong comparison (RFC 9110 13.1.1), so weak tags never match.
+    versions = []
+    for tag in parse_etags(header):
+        if tag == "*":
+            return None
+        if tag.startswith("W/"):
+            continue
+        tag_id, _, version = tag.strip('"').partition("-")
+        if tag_id != str(id):
+            continue
+        try:
+            versions.append(datetime.strptime(version, _VERSION_FORMAT))
+        except ValueError:
+            continue
+    return versions
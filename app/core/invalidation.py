@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import String, bindparam, event, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_invalidations"
+
+_handlers: Dict[str, Tuple[Callable[[Dict[str, Any]], None], Callable[[], None]]] = {}
+
+
+def register(kind: str, handler: Callable[[Dict[str, Any]], None], reset: Callable[[], None]) -> None:
+    _handlers[kind] = (handler, reset)
+
+
+def dispatch(kind: str, data: Dict[str, Any]) -> None:
+    entry = _handlers.get(kind)
+    if entry is not None:
+        entry[0](data)
+
+
+def reset_all() -> None:
+    for _, reset in _handlers.values():
+        reset()
+
+
+_NOTIFY_MANY = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+).bindparams(bindparam("payloads", type_=ARRAY(String)))
+
+
+async def publish(db: AsyncSession, kind: str, **data: Any) -> None:
+    await publish_many(db, kind, [data])
+
+
+async def publish_many(db: AsyncSession, kind: str, items: List[Dict[str, Any]]) -> None:
+    db.info.setdefault(_PENDING_KEY, []).extend((kind, data) for data in items)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_pending(session: Session) -> None:
+    pending = session.info.get(_PENDING_KEY)
+    if not pending:
+        return
+    payloads = [json.dumps({"kind": kind, **data}, separators=(",", ":")) for kind, data in pending]
+    if len(payloads) == 1:
+        session.execute(select(func.pg_notify(settings.CACHE_INVALIDATION_CHANNEL, payloads[0])))
+    else:
+        session.execute(_NOTIFY_MANY, {"channel": settings.CACHE_INVALIDATION_CHANNEL, "payloads": payloads})
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    for kind, data in session.info.pop(_PENDING_KEY, ()):
+        dispatch(kind, data)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _on_notification(connection, pid: int, channel: str, payload: str) -> None:
+    try:
+        message = json.loads(payload)
+        dispatch(message.pop("kind"), message)
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring malformed cache invalidation: %r", payload)
+
+
+async def listen(engine: AsyncEngine) -> None:
+    channel = settings.CACHE_INVALIDATION_CHANNEL
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                await driver.add_listener(channel, _on_notification)
+                # Anything published while we were not listening is lost.
+                reset_all()
+                try:
+                    while not driver.is_closed():
+                        await asyncio.sleep(settings.CACHE_INVALIDATION_HEALTH_SECONDS)
+                finally:
+                    if not driver.is_closed():
+                        await driver.remove_listener(channel, _on_notification)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed, reconnecting")
+        reset_all()
+        await asyncio.sleep(1)
@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+
+    def register(self, metric: "Metric") -> None:
+        self._metrics.append(metric)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+
+registry = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        with self._lock:
+            return [
+                (labels, list(value) if isinstance(value, list) else value)
+                for labels, value in self._values.items()
+            ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(labels), value] for labels, value in self.samples()],
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # One count per bucket plus +Inf, then the running sum.
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), "buckets": list(self.buckets)}
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect: Optional[Callable[[], Iterable[Tuple[Labels, float]]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        if self._collect is not None:
+            return [(tuple(labels), value) for labels, value in self._collect()]
+        return super().samples()
+
+
+class Timer:
+    def __init__(self, histogram: Histogram, *labels: str):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+http_request_errors_total = Counter(
+    "http_request_errors_total", "HTTP requests that ended in a 5xx response.", ["method", "route"]
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"]
+)
+http_request_db_statements = Histogram(
+    "http_request_db_statements", "SQL statements executed per request by route.", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+db_pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled database connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+jwt_decode_seconds = Histogram(
+    "jwt_decode_seconds", "Time spent decoding and verifying JWTs.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+password_hash_seconds = Histogram(
+    "password_hash_seconds", "bcrypt hashing and verification time, including executor queueing.", ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{pid}.json")
+
+
+def write_snapshot(directory: str) -> None:
+    path = _snapshot_path(directory, os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots: Iterable[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for pid, snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            samples = target["samples"]
+            if metric["type"] == "gauge":
+                # Gauges describe a live process, so they are kept per worker.
+                if not _pid_alive(pid):
+                    continue
+                target["labelnames"] = metric["labelnames"] + ["pid"]
+                for labels, value in metric["samples"]:
+                    samples[tuple(labels) + (str(pid),)] = value
+                continue
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if key not in samples:
+                    samples[key] = value
+                elif metric["type"] == "histogram":
+                    samples[key] = [a + b for a, b in zip(samples[key], value)]
+                else:
+                    samples[key] += value
+    for metric in merged.values():
+        metric["samples"] = [[list(labels), value] for labels, value in metric["samples"].items()]
+    return merged
+
+
+def collect() -> Dict[str, Any]:
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if not directory:
+        return registry.snapshot()
+    write_snapshot(directory)
+    snapshots = []
+    for filename in os.listdir(directory):
+        stem, ext = os.path.splitext(filename)
+        if ext != ".json" or not stem.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshots.append((int(stem), json.load(f)))
+        except (OSError, ValueError):
+            continue
+    return merge(snapshots)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render(snapshot: Dict[str, Any]) -> str:
+    lines = []
+    for name, metric in snapshot.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in metric["samples"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + [float("inf")], value[:-1]):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
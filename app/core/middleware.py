@@ -1,29 +1,140 @@
+import logging
+import random
 import time
 import uuid
-import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import metrics
+from app.core.config import settings
+from app.db import replicas
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class LoggingMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = settings.ACCESS_LOG_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         request_id = str(uuid.uuid4())
-        start_time = time.time()
-        
-
-
-        response = await call_next(request)
-        
-        duration = time.time() - start_time
-        logger.info(
-            f"Request ID: {request_id} | Path: {request.url.path} | "
-            f"Method: {request.method} | Status: {response.status_code} | "
-            f"Duration: {duration:.4f}s"
-        )
-        
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Execution-Time"] = str(duration)
-        
-        return response
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Request-ID", request_id)
+                headers.append("X-Execution-Time", str(time.perf_counter() - start_time))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if status_code >= 500 or random.random() < self.sample_rate:
+                duration = time.perf_counter() - start_time
+                logger.info(
+                    "Request ID: %s | Path: %s | Method: %s | Status: %s | Duration: %.4fs",
+                    request_id, scope["path"], scope["method"], status_code, duration,
+                    extra={
+                        "request_id": request_id,
+                        "path": scope["path"],
+                        "method": scope["method"],
+                        "status": status_code,
+                        "duration": duration,
+                    },
+                )
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    path = scope["path"]
+    # Routes of prefixed routers may only know the part of the path after the prefix.
+    for index, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[index:]):
+            return path[:index] + route.path
+    return route.path
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats()
+        token = metrics.request_stats.set(stats)
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SQL_STATEMENT_HEADER:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Statements", str(stats.statements))
+                    headers.append("X-DB-Time", f"{stats.db_seconds * 1000:.2f}ms")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.request_stats.reset(token)
+            route = route_template(scope)
+            method = scope["method"]
+            metrics.http_request_duration_seconds.observe(time.perf_counter() - start_time, method, route)
+            metrics.http_requests_total.inc(method, route, str(status_code))
+            metrics.http_request_db_statements.observe(stats.statements, method, route)
+            if status_code >= 500:
+                metrics.http_request_errors_total.inc(method, route)
+
+
+class ReadYourWritesMiddleware:
+    """Carries the client's last-commit time between requests (cookie or X-Last-Write header)
+    so any worker can keep that client's reads on the primary while replicas catch up."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replicas.read_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        marker = connection.headers.get(replicas.WRITE_MARKER_HEADER) or connection.cookies.get(replicas.WRITE_MARKER_COOKIE)
+        try:
+            last_write = float(marker) if marker else None
+        except ValueError:
+            last_write = None
+        writes = replicas.RequestWrites(last_write=last_write)
+        token = replicas.request_writes.set(writes)
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes.wrote:
+                value = f"{writes.last_write:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(replicas.WRITE_MARKER_HEADER, value)
+                headers.append(
+                    "Set-Cookie",
+                    f"{replicas.WRITE_MARKER_COOKIE}={value}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            replicas.request_writes.reset(token)
@@ -0,0 +1,118 @@
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Allowance for boundaries and part headers when checking Content-Length against a file size limit.
+MULTIPART_OVERHEAD = 64 * 1024
+MAX_PART_HEADERS = 8
+MAX_PART_HEADER_BYTES = 4 * 1024
+
+
+class MultipartError(ValueError):
+    pass
+
+
+class MultipartTooLarge(MultipartError):
+    pass
+
+
+class MultipartFile:
+    """One file field of a multipart/form-data request, read straight off the ASGI body stream."""
+
+    def __init__(self, request: Request, field: str, chunk_size: int, max_body_bytes: int):
+        content_type, params = parse_options_header(request.headers.get("content-type"))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise MultipartError("Expected a multipart/form-data body")
+        self.field = field
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._request = request
+        self._chunk_size = chunk_size
+        self._max_body_bytes = max_body_bytes
+        self._header_bytes = 0
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_field = False
+        self._found = False
+        self._done = False
+        self._data: List[bytes] = []
+        self._parser = MultipartParser(params[b"boundary"], callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        buffer = bytearray()
+        received = 0
+        async for body in self._request.stream():
+            received += len(body)
+            if received > self._max_body_bytes:
+                raise MultipartTooLarge(f"Request body exceeds {self._max_body_bytes} bytes")
+            try:
+                self._parser.write(body)
+            except MultipartParseError as exc:
+                raise MultipartError(f"Malformed multipart body: {exc}")
+            for data in self._data:
+                buffer += data
+            self._data.clear()
+            if len(buffer) >= self._chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+            if self._done:
+                break
+
+        if not self._found:
+            raise MultipartError(f"Missing file field '{self.field}'")
+        if not self._done:
+            raise MultipartError("Incomplete multipart body")
+        if buffer:
+            yield bytes(buffer)
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._header_bytes = 0
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._count_header_bytes(end - start)
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._count_header_bytes(end - start)
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if len(self._headers) >= MAX_PART_HEADERS:
+            raise MultipartError(f"More than {MAX_PART_HEADERS} headers in a multipart part")
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _count_header_bytes(self, size: int) -> None:
+        self._header_bytes += size
+        if self._header_bytes > MAX_PART_HEADER_BYTES:
+            raise MultipartError(f"Multipart part headers exceed {MAX_PART_HEADER_BYTES} bytes")
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        if self._found or options.get(b"name", b"").decode("latin-1") != self.field:
+            return
+        self._found = self._in_field = True
+        self.filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+        self.content_type = self._headers.get(b"content-type", b"application/octet-stream").decode("latin-1")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_field:
+            self._data.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_field:
+            self._in_field = False
+            self._done = True
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.users.models import RevokedToken
+
+# Rows are stamped with the inserting transaction's start time, so a slow
+# commit can land behind the watermark; re-read a window to catch those.
+_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class RevocationList:
+    def __init__(self):
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        self._revoked[jti] = expires_at
+
+    def purge(self) -> None:
+        now = datetime.utcnow()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    async def load(self, db: AsyncSession) -> None:
+        self._revoked.clear()
+        self._watermark = None
+        await self.refresh(db)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.created_at).filter(
+            RevokedToken.expires_at > datetime.utcnow()
+        )
+        if self._watermark is not None:
+            query = query.filter(RevokedToken.created_at >= self._watermark - _REFRESH_OVERLAP)
+        result = await db.execute(query)
+        for jti, expires_at, created_at in result.all():
+            self._revoked[jti] = expires_at
+            if self._watermark is None or created_at > self._watermark:
+                self._watermark = created_at
+        self.purge()
+
+
+revocation_list = RevocationList()
@@ -1,4 +1,5 @@
 from app.db.session import Base
-from app.users.models import User
+from app.users.models import User, RevokedToken
 from app.documents.models import Document
-from app.shares.models import DocumentShare
+from app.shares.models import DocumentShare, DocumentGroupShare, DocumentAccess
+from app.groups.models import Group, GroupMembership
@@ -0,0 +1,77 @@
+import logging
+import time
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import metrics
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_wait_seconds.observe(time.perf_counter() - start)
+
+
+def redact(parameters: Any, executemany: bool = False) -> Any:
+    if executemany and isinstance(parameters, (list, tuple)):
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+    stats = metrics.request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["statement_start"].pop()
+    stats = metrics.request_stats.get()
+    if stats is not None:
+        stats.db_seconds += elapsed
+    if elapsed >= settings.SLOW_QUERY_SECONDS:
+        slow_query_logger.warning(
+            "Slow query (%.3fs): %s | params: %s",
+            elapsed, statement, redact(parameters, executemany),
+            extra={"duration": elapsed, "statement": statement},
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_statement(exception_context) -> None:
+    starts = exception_context.connection.info.get("statement_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def register_pool_metrics(engines: Dict[str, AsyncEngine]) -> None:
+    def collect(read):
+        return lambda: [((name,), read(engine.pool)) for name, engine in engines.items()]
+
+    metrics.Gauge(
+        "db_pool_checked_out", "Connections currently checked out of the pool.", ["engine"],
+        collect=collect(lambda pool: pool.checkedout()),
+    )
+    metrics.Gauge(
+        "db_pool_overflow", "Connections open beyond pool_size.", ["engine"],
+        collect=collect(lambda pool: max(pool.overflow(), 0)),
+    )
+    metrics.Gauge(
+        "db_pool_size", "Configured pool_size.", ["engine"],
+        collect=collect(lambda pool: pool.size()),
+    )
@@ -0,0 +1,110 @@
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import replica_engines
+
+logger = logging.getLogger(__name__)
+
+WRITE_MARKER_COOKIE = "last_write"
+WRITE_MARKER_HEADER = "X-Last-Write"
+
+
+@dataclass
+class RequestWrites:
+    # Wall-clock time of the client's last commit, as echoed back by the client,
+    # so read-your-writes holds whichever worker serves the next request.
+    last_write: Optional[float] = None
+    wrote: bool = False
+
+    @property
+    def recent(self) -> bool:
+        return self.last_write is not None and time.time() - self.last_write < settings.READ_YOUR_WRITES_SECONDS
+
+
+request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+def is_replica(session: AsyncSession) -> bool:
+    # Replicas can lag behind invalidations already applied for the primary, so
+    # rows read from them must not be written into the shared caches.
+    return session.info.get("replica", False)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            info={"replica": True},
+        )
+        self.retry_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def mark_unhealthy(self) -> None:
+        self.retry_at = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+
+class ReadRouter:
+    def __init__(self, engines: List[AsyncEngine]):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.recent_writers = TTLCache(maxsize=100000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+        self._cycle = itertools.count()
+        self._request_user: ContextVar[Optional[int]] = ContextVar("request_user", default=None)
+
+    def bind_user(self, user_id: int) -> None:
+        self._request_user.set(user_id)
+
+    def record_write(self) -> None:
+        user_id = self._request_user.get()
+        if user_id is not None:
+            self.recent_writers.set(user_id, True)
+        writes = request_writes.get()
+        if writes is not None:
+            writes.last_write = time.time()
+            writes.wrote = True
+
+    async def open_session(self, user_id: int) -> Optional[AsyncSession]:
+        if not self.replicas or self.recent_writers.get(user_id):
+            return None
+        writes = request_writes.get()
+        if writes is not None and writes.recent:
+            return None
+        start = next(self._cycle)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if not replica.healthy:
+                continue
+            session = replica.sessionmaker()
+            try:
+                await session.connection()
+            except (OSError, DBAPIError):
+                logger.warning("Read replica %s unavailable, falling back", replica.engine.url)
+                replica.mark_unhealthy()
+                await session.close()
+                continue
+            return session
+        return None
+
+
+read_router = ReadRouter(replica_engines)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session) -> None:
+    read_router.record_write()
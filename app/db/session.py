@@ -1,8 +1,16 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
+from app.db.instrumentation import InstrumentedPool, register_pool_metrics
 
-engine = create_async_engine(settings.async_database_url, echo=True)
+engine = create_async_engine(settings.async_database_url, echo=settings.SQL_ECHO, poolclass=InstrumentedPool)
+replica_engines = [
+    create_async_engine(url, echo=settings.SQL_ECHO, poolclass=InstrumentedPool) for url in settings.DATABASE_REPLICA_URLS
+]
+register_pool_metrics({
+    "primary": engine,
+    **{f"replica{index}": replica for index, replica in enumerate(replica_engines)},
+})
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -1,15 +1,23 @@
+import os
 from datetime import datetime
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from anyio import to_thread
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from starlette.background import BackgroundTask
 
+from app.core.config import settings
 from app.db.session import get_db
-from app.documents import schemas, service
-from app.core import dependencies
-from app.users.models import User
-from app.shares.models import DocumentShare, PermissionType
+from app.documents import export, schemas, service
+from app.documents.previews import PREVIEW_MEDIA_TYPE, PREVIEW_RETRY_SECONDS, preview_pool, supports as supports_preview
+from app.documents.search_cache import search_cache, search_key
+from app.core import dependencies, etags
+from app.core.multipart import MULTIPART_OVERHEAD, MultipartError, MultipartFile, MultipartTooLarge
+from app.users.schemas import User
+from app.shares.permissions import AccessLevel, PermissionResolver
+from app.storage.service import ContentService, ContentTooLarge
 
 router = APIRouter()
 
@@ -22,28 +30,89 @@ async def create_document(
 ) -> Any:
     return await service.DocumentService.create(db, doc_in=document_in, owner_id=current_user.id)
 
+@router.post("/batch", response_model=List[schemas.DocumentBatchResult])
+async def create_documents_batch(
+    *,
+    db: AsyncSession = Depends(get_db),
+    batch_in: schemas.DocumentBatchCreate,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    documents = await service.DocumentService.create_many(db, docs_in=batch_in.items, owner_id=current_user.id)
+    return [
+        {"index": index, "status_code": 201, "document": document}
+        for index, document in enumerate(documents)
+    ]
+
+@router.get("/", response_model=List[schemas.Document])
+async def read_documents(
+    *,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    ids: List[int] = Query(..., max_length=settings.BATCH_MAX_ITEMS),
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    documents = await service.DocumentService.get_many(db, ids=list(set(ids)), user_id=current_user.id)
+    return Response(content=schemas.document_rows_adapter.dump_json(documents), media_type="application/json")
+
 @router.get("/{id}", response_model=schemas.Document)
 async def read_document(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(dependencies.get_read_db),
     id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(dependencies.get_current_user)
 ) -> Any:
-    document = await service.DocumentService.get(db, id=id)
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    if document.owner_id == current_user.id:
-        return document
-        
-    share_query = select(DocumentShare).filter(
-        and_(DocumentShare.document_id == id, DocumentShare.user_id == current_user.id)
+    if if_none_match:
+        version, access = await PermissionResolver.resolve_version(db, document_id=id, user_id=current_user.id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if access < AccessLevel.READ:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        etag = etags.make_etag(id, version)
+        if etags.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    document = await _readable_document(db, id, current_user.id)
+    response.headers["ETag"] = etags.make_etag(document.id, document.updated_at)
+    return document
+
+@router.get("/{id}/content", response_class=FileResponse)
+@router.head("/{id}/content", response_class=FileResponse)
+async def download_document_content(
+    *,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    id: int,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    document = await _readable_document(db, id, current_user.id)
+    if document.content_digest is None:
+        raise HTTPException(status_code=404, detail="Document has no content")
+    etag = etags.make_content_etag(document.content_digest)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etags.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    path = ContentService.local_path(document.content_digest)
+    if path is None:
+        return StreamingResponse(
+            ContentService.read(document.content_digest),
+            media_type=document.content_type,
+            headers={**headers, "Content-Length": str(document.content_size), "Accept-Ranges": "none"},
+        )
+    try:
+        stat_result = await to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Document content not found")
+    # Range, If-Range and HEAD are handled by FileResponse, which uses the
+    # server's pathsend (sendfile) extension for full-body responses when offered.
+    return FileResponse(
+        path,
+        media_type=document.content_type,
+        filename=document.content_filename,
+        stat_result=stat_result,
+        headers=headers,
     )
-    share_result = await db.execute(share_query)
-    if share_result.scalars().first():
-        return document
-        
-    raise HTTPException(status_code=403, detail="Not enough permissions")
 
 @router.put("/{id}", response_model=schemas.Document)
 async def update_document(
@@ -51,56 +120,197 @@ async def update_document(
     db: AsyncSession = Depends(get_db),
     id: int,
     document_in: schemas.DocumentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(dependencies.get_current_user)
 ) -> Any:
-    document = await service.DocumentService.get(db, id=id)
+    versions = etags.parse_versions(if_match, id) if if_match else None
+    db_obj = await service.DocumentService.update(
+        db, id=id, obj_in=document_in, user_id=current_user.id, versions=versions
+    )
+    if db_obj:
+        response.headers["ETag"] = etags.make_etag(db_obj.id, db_obj.updated_at)
+        return db_obj
+    await _raise_write_denied(db, id, current_user.id, if_match)
+
+@router.put("/{id}/content", response_model=schemas.Document)
+async def upload_document_content(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id: int,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    content_length: Optional[int] = Header(None),
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    if content_length is not None and content_length > settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail="Upload too large")
+    document, access = await PermissionResolver.resolve(db, document_id=id, user_id=current_user.id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-        
-    if document.owner_id != current_user.id:
-        share_query = select(DocumentShare).filter(
-            and_(
-                DocumentShare.document_id == id, 
-                DocumentShare.user_id == current_user.id,
-                DocumentShare.permission == PermissionType.WRITE
-            )
+    if access < AccessLevel.WRITE:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    versions = etags.parse_versions(if_match, id) if if_match else None
+    if versions is not None and document.updated_at not in versions:
+        raise HTTPException(status_code=412, detail="Document has been modified")
+    # Don't hold a pooled connection while the body streams in.
+    await db.rollback()
+
+    try:
+        upload = MultipartFile(
+            request, field="file", chunk_size=settings.UPLOAD_CHUNK_SIZE,
+            max_body_bytes=settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD,
         )
-        share_result = await db.execute(share_query)
-        if not share_result.scalars().first():
-            raise HTTPException(status_code=403, detail="Not enough permissions")
+        content = await ContentService.store(upload.chunks(), max_bytes=settings.UPLOAD_MAX_BYTES)
+    except (MultipartTooLarge, ContentTooLarge) as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except MultipartError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    return await service.DocumentService.update(db, db_obj=document, obj_in=document_in)
+    db_obj = await service.DocumentService.set_content(
+        db, id=id, user_id=current_user.id, content=content,
+        content_type=upload.content_type, filename=upload.filename, versions=versions
+    )
+    if db_obj:
+        background_tasks.add_task(preview_pool.generate, db_obj.content_digest, db_obj.content_type)
+        response.headers["ETag"] = etags.make_etag(db_obj.id, db_obj.updated_at)
+        return db_obj
+    await _raise_write_denied(db, id, current_user.id, if_match)
+
+@router.get("/{id}/preview/{digest}", response_class=FileResponse)
+async def read_document_preview(
+    *,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    id: int,
+    digest: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    document = await _readable_document(db, id, current_user.id)
+    if document.content_digest != digest:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    # The URL names the content digest, so a cached preview can never go stale.
+    etag = etags.make_content_etag(f"{digest}-preview-{preview_pool.size}")
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if if_none_match and etags.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    path = preview_pool.local_path(digest)
+    try:
+        stat_result = await to_thread.run_sync(os.stat, path) if path else None
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None:
+        if not supports_preview(document.content_type) or preview_pool.has_failed(digest):
+            raise HTTPException(status_code=404, detail="Preview not available")
+        # Missing because it is still queued, was skipped, or was lost to a
+        # restart: (re)schedule it and let the client retry.
+        return JSONResponse(
+            status_code=404,
+            content={"detail": "Preview not available yet"},
+            headers={"Retry-After": str(PREVIEW_RETRY_SECONDS), "Cache-Control": "no-store"},
+            background=BackgroundTask(preview_pool.generate, digest, document.content_type),
+        )
+    return FileResponse(
+        path,
+        media_type=PREVIEW_MEDIA_TYPE,
+        stat_result=stat_result,
+        headers=headers,
+        content_disposition_type="inline",
+    )
+
+async def _readable_document(db: AsyncSession, id: int, user_id: int) -> schemas.Document:
+    document, access = await PermissionResolver.resolve(db, document_id=id, user_id=user_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if access < AccessLevel.READ:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return document
+
+async def _raise_write_denied(db: AsyncSession, id: int, user_id: int, if_match: Optional[str]) -> None:
+    document, access = await PermissionResolver.resolve(db, document_id=id, user_id=user_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if if_match and access >= AccessLevel.WRITE:
+        raise HTTPException(status_code=412, detail="Document has been modified")
+    raise HTTPException(status_code=403, detail="Not enough permissions")
 
 @router.delete("/{id}", response_model=schemas.Document)
 async def delete_document(
     *,
     db: AsyncSession = Depends(get_db),
     id: int,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(dependencies.get_current_user)
 ) -> Any:
-    document = await service.DocumentService.get(db, id=id)
+    versions = etags.parse_versions(if_match, id) if if_match else None
+    db_obj = await service.DocumentService.delete(db, id=id, owner_id=current_user.id, versions=versions)
+    if db_obj:
+        return db_obj
+
+    document, access = await PermissionResolver.resolve(db, document_id=id, user_id=current_user.id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    if document.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only owners can delete documents")
-        
-    return await service.DocumentService.delete(db, db_obj=document)
+    if if_match and access >= AccessLevel.OWNER:
+        raise HTTPException(status_code=412, detail="Document has been modified")
+    raise HTTPException(status_code=403, detail="Only owners can delete documents")
 
 @router.get("/search/", response_model=schemas.DocumentSearchResults)
 async def search_documents(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(dependencies.get_read_db),
     q: Optional[str] = Query(None),
     tag: Optional[List[str]] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    skip: int = 0,
-    limit: int = 10,
+    mode: schemas.SearchMode = Query(schemas.SearchMode.FTS),
+    facets: Optional[List[schemas.SearchFacet]] = Query(None),
+    cursor: Optional[str] = Query(None),
+    count: schemas.CountMode = Query(schemas.CountMode.EXACT),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=settings.SEARCH_MAX_LIMIT),
     current_user: User = Depends(dependencies.get_current_user)
 ) -> Any:
-    items, total = await service.DocumentService.search(
-        db, user_id=current_user.id, q=q, tags=tag, 
-        start_date=start_date, end_date=end_date, skip=skip, limit=limit
+    key = search_key(
+        current_user.id, q=q, tags=tag, start_date=start_date, end_date=end_date, mode=mode,
+        facets=facets, cursor=cursor, count=count, skip=skip, limit=limit
+    )
+    body = search_cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    try:
+        result = await service.DocumentService.search(
+            db, user_id=current_user.id, q=q, tags=tag, 
+            start_date=start_date, end_date=end_date, skip=skip, limit=limit, mode=mode,
+            facets=facets, cursor=cursor, count=count
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    body = schemas.search_results_adapter.dump_json(result)
+    search_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+@router.get("/export/")
+async def export_documents(
+    *,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    format: schemas.ExportFormat = Query(schemas.ExportFormat.NDJSON),
+    q: Optional[str] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    mode: schemas.SearchMode = Query(schemas.SearchMode.FTS),
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    batches = service.DocumentService.export(
+        db, user_id=current_user.id, q=q, tags=tag,
+        start_date=start_date, end_date=end_date, mode=mode
+    )
+    return StreamingResponse(
+        export.ENCODERS[format](batches),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="documents.{format.value}"'},
     )
-    return {"items": items, "total": total}
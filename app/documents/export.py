@@ -0,0 +1,49 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, List
+
+from app.documents import schemas
+
+CSV_COLUMNS = list(schemas.DocumentRow.__annotations__)
+
+MEDIA_TYPES = {
+    schemas.ExportFormat.NDJSON: "application/x-ndjson",
+    schemas.ExportFormat.CSV: "text/csv",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[schemas.DocumentRow]]) -> AsyncIterator[bytes]:
+    dump = schemas.document_row_adapter.dump_json
+    async for rows in batches:
+        yield b"".join(dump(row) + b"\n" for row in rows)
+
+
+async def csv_chunks(batches: AsyncIterator[List[schemas.DocumentRow]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for rows in batches:
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in CSV_COLUMNS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+ENCODERS = {
+    schemas.ExportFormat.NDJSON: ndjson_chunks,
+    schemas.ExportFormat.CSV: csv_chunks,
+}
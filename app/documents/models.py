@@ -1,22 +1,46 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import BigInteger, String, Integer, DateTime, ForeignKey, Computed, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
 from datetime import datetime
 from typing import List, Optional
 
+SEARCH_CONFIG = "english"
+
+
 class Document(Base):
     __tablename__ = "document"
+    __table_args__ = (
+        Index("ix_document_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_document_tags", "tags", postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}),
+        Index("ix_document_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_document_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String, index=True, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=True)
-    tags: Mapped[Optional[List[str]]] = mapped_column(JSON, nullable=True)
+    tags: Mapped[Optional[List[str]]] = mapped_column(JSONB(none_as_null=True), nullable=True)
     s3_url: Mapped[str] = mapped_column(String, nullable=False)
-    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+    content_digest: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    content_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    content_filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
 
     owner: Mapped["User"] = relationship("User", back_populates="documents")
-    shares: Mapped[List["DocumentShare"]] = relationship("DocumentShare", back_populates="document", cascade="all, delete-orphan")
+    shares: Mapped[List["DocumentShare"]] = relationship("DocumentShare", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+    group_shares: Mapped[List["DocumentGroupShare"]] = relationship("DocumentGroupShare", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,121 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Set
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.storage import service as storage
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_FORMAT = "WEBP"
+PREVIEW_MEDIA_TYPE = "image/webp"
+PREVIEW_RETRY_SECONDS = 2
+TEXT_PREVIEW_BYTES = 4096
+
+
+def preview_key(digest: str, size: int) -> str:
+    return f"{storage.content_key(digest)}.preview-{size}.webp"
+
+
+def supports(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.split("/", 1)[0] in ("image", "text")
+
+
+def render(path: str, content_type: str, size: int) -> bytes:
+    if content_type.startswith("image/"):
+        image = _render_image(path, size)
+    else:
+        image = _render_text(path, size)
+    out = io.BytesIO()
+    image.save(out, PREVIEW_FORMAT, quality=80)
+    return out.getvalue()
+
+
+def _render_image(path: str, size: int) -> Image.Image:
+    with Image.open(path) as image:
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        return image.copy()
+
+
+def _render_text(path: str, size: int) -> Image.Image:
+    with open(path, "rb") as source:
+        text = source.read(TEXT_PREVIEW_BYTES).decode("utf-8", "replace")
+    image = Image.new("RGB", (size, size), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    line_height = max(1, size // 24)
+    for index, line in enumerate(text.splitlines()[: size // line_height]):
+        draw.text((4, index * line_height), line.expandtabs(4), fill="black", font=font)
+    return image
+
+
+class PreviewPool:
+    def __init__(self, workers: int, max_pending: int, size: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.size = size
+        self.rejected = 0
+        self.failed = 0
+        self._running: Set[str] = set()
+        # Digests whose render raised; not retried until the entry expires.
+        self.failures = TTLCache(maxsize=settings.PREVIEW_FAILED_MAX_SIZE, ttl=settings.PREVIEW_FAILED_TTL_SECONDS)
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def generate(self, digest: str, content_type: Optional[str]) -> None:
+        """Render and store the preview for a content digest, once per digest, off the event loop."""
+        if self.workers <= 0 or not supports(content_type) or digest in self._running or self.has_failed(digest):
+            return
+        key = preview_key(digest, self.size)
+        source = storage.ContentService.local_path(digest)
+        if source is None or await storage.object_store.head_object(key) is not None:
+            return
+        if len(self._running) >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Preview queue full, skipping %s", digest)
+            return
+
+        self._running.add(digest)
+        try:
+            loop = asyncio.get_running_loop()
+            preview = await loop.run_in_executor(self.executor, render, source, content_type, self.size)
+            upload = await storage.object_store.create_upload()
+            await upload.write(preview)
+            await upload.complete(key)
+        except Exception:
+            self.failed += 1
+            self.failures.set(digest, True)
+            logger.exception("Preview generation failed for %s", digest)
+        finally:
+            self._running.discard(digest)
+
+    def has_failed(self, digest: str) -> bool:
+        return self.failures.get(digest) is not None
+
+    def local_path(self, digest: str) -> Optional[str]:
+        return storage.object_store.local_path(preview_key(digest, self.size))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+preview_pool = PreviewPool(
+    workers=settings.PREVIEW_WORKERS,
+    max_pending=settings.PREVIEW_MAX_PENDING,
+    size=settings.PREVIEW_SIZE,
+)
@@ -1,6 +1,25 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Dict, List, Optional
+from typing_extensions import TypedDict
 from datetime import datetime
+import enum
+from app.core.config import settings
+
+class SearchMode(str, enum.Enum):
+    FTS = "fts"
+    ILIKE = "ilike"
+
+class CountMode(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+class SearchFacet(str, enum.Enum):
+    TAGS = "tags"
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
 
 class DocumentBase(BaseModel):
     title: str
@@ -22,10 +41,63 @@ class Document(DocumentBase):
     owner_id: int
     created_at: datetime
     updated_at: datetime
+    content_digest: Optional[str] = None
+    content_size: Optional[int] = None
+    content_type: Optional[str] = None
+    content_filename: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+class DocumentBatchCreate(BaseModel):
+    items: List[DocumentCreate] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+class DocumentBatchResult(BaseModel):
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    document: Optional[Document] = None
+
+class DocumentSearchHit(Document):
+    rank: Optional[float] = None
+    highlight: Optional[str] = None
+
 class DocumentSearchResults(BaseModel):
-    items: List[Document]
-    total: int
+    items: List[DocumentSearchHit]
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    has_more: bool = False
+    facets: Optional[Dict[SearchFacet, Dict[str, int]]] = None
+    next_cursor: Optional[str] = None
+
+
+class DocumentRow(TypedDict):
+    title: str
+    description: Optional[str]
+    tags: Optional[List[str]]
+    s3_url: str
+    id: int
+    owner_id: int
+    created_at: datetime
+    updated_at: datetime
+    content_digest: Optional[str]
+    content_size: Optional[int]
+    content_type: Optional[str]
+    content_filename: Optional[str]
+
+class DocumentSearchHitRow(DocumentRow):
+    rank: Optional[float]
+    highlight: Optional[str]
+
+class DocumentSearchResultsRow(TypedDict):
+    items: List[DocumentSearchHitRow]
+    total: Optional[int]
+    total_is_estimate: bool
+    has_more: bool
+    facets: Optional[Dict[SearchFacet, Dict[str, int]]]
+    next_cursor: Optional[str]
+
+# Serializers for rows read straight from Core queries; they dump without re-validating.
+document_row_adapter = TypeAdapter(DocumentRow)
+document_rows_adapter = TypeAdapter(List[DocumentRow])
+search_results_adapter = TypeAdapter(DocumentSearchResultsRow)
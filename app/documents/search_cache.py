@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Any, Hashable, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import invalidation
+from app.core.cache import ResponseCache
+from app.core.config import settings
+
+# NOTIFY payloads are capped at 8000 bytes; wider fan-outs drop every user's entries.
+FANOUT_LIMIT = 500
+
+search_cache = ResponseCache(
+    maxsize=settings.SEARCH_CACHE_MAX_SIZE,
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+)
+
+
+def _on_invalidation(data: Any) -> None:
+    if data.get("all"):
+        search_cache.bump_all()
+        return
+    for user_id in data["user_ids"]:
+        search_cache.bump(user_id)
+
+
+invalidation.register("search", _on_invalidation, search_cache.clear)
+
+
+def search_key(user_id: int, **params: Any) -> Hashable:
+    normalized = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(str(item) for item in value))
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, str):
+            value = value.strip()
+        normalized.append((name, value))
+    return (user_id, search_cache.generation(user_id), tuple(normalized))
+
+
+async def publish(db: AsyncSession, user_ids: Iterable[Optional[int]]) -> None:
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if len(user_ids) > FANOUT_LIMIT:
+        await invalidation.publish(db, "search", all=True)
+    elif user_ids:
+        await invalidation.publish(db, "search", user_ids=user_ids)
+
@@ -1,17 +1,89 @@
-from typing import Any, List, Optional
+import base64
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_, func
-from app.documents import models, schemas
-from app.shares.models import DocumentShare, PermissionType
+from sqlalchemy import select, insert, update, delete, exists, or_, and_, func, cast, literal, case, true, tuple_, union
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.explain import explain
+from app.db.replicas import is_replica
+from app.documents import models, schemas, search_cache
+from app.shares.access import AccessIndexService
+from app.groups.service import GroupService
+from app.shares.models import AccessLevel, DocumentAccess, DocumentGroupShare, PermissionType
+from app.groups.models import GroupMembership
+from app.storage.base import ObjectInfo
+from app.storage.service import ContentService
 from datetime import datetime
 
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2"
+FACET_LIMIT = 100
+COUNT_ESTIMATE_CAP = 1000
+DOCUMENT_COLUMNS = (
+    models.Document.title,
+    models.Document.description,
+    models.Document.tags,
+    models.Document.s3_url,
+    models.Document.id,
+    models.Document.owner_id,
+    models.Document.created_at,
+    models.Document.updated_at,
+    models.Document.content_digest,
+    models.Document.content_size,
+    models.Document.content_type,
+    models.Document.content_filename,
+)
+
+document_cache = TTLCache(
+    maxsize=settings.DOCUMENT_CACHE_MAX_SIZE,
+    ttl=settings.DOCUMENT_CACHE_TTL_SECONDS,
+)
+invalidation.register(
+    "document",
+    lambda data: document_cache.pop(data["id"]),
+    document_cache.clear,
+)
+
+def _escape_html(text):
+    # Highlights are HTML (<b> marks the matches), so the stored text is escaped first.
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        text = func.replace(text, char, entity)
+    return text
+
+def _encode_cursor(kind: str, sort_value: Any, last_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([kind, sort_value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, expected_kind: str) -> Any:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if kind != expected_kind or not isinstance(last_id, int):
+            raise ValueError(kind)
+        if kind == "created_at":
+            sort_value = datetime.fromisoformat(sort_value)
+        else:
+            sort_value = float(sort_value)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid or mismatched search cursor")
+    return sort_value, last_id
+
+
 class DocumentService:
     @staticmethod
     async def create(db: AsyncSession, doc_in: schemas.DocumentCreate, owner_id: int) -> models.Document:
-        db_obj = models.Document(**doc_in.model_dump(), owner_id=owner_id)
-        db.add(db_obj)
+        db_obj = await db.scalar(
+            insert(models.Document)
+            .values(**doc_in.model_dump(), owner_id=owner_id)
+            .returning(models.Document)
+        )
+        await AccessIndexService.grant_owners(db, document_ids=[db_obj.id])
+        await search_cache.publish(db, [owner_id])
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     @staticmethod
@@ -20,53 +92,310 @@ class DocumentService:
         return result.scalars().first()
 
     @staticmethod
-    async def update(db: AsyncSession, db_obj: models.Document, obj_in: schemas.DocumentUpdate) -> models.Document:
-        update_data = obj_in.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
+    def cache(db: AsyncSession, db_obj: models.Document) -> schemas.Document:
+        document = schemas.Document.model_validate(db_obj)
+        if not is_replica(db):
+            document_cache.set(db_obj.id, document)
+        return document
+
+    @staticmethod
+    async def update(
+        db: AsyncSession,
+        id: int,
+        obj_in: schemas.DocumentUpdate,
+        user_id: int,
+        versions: Optional[List[datetime]] = None,
+    ) -> Optional[models.Document]:
+        return await DocumentService._update_writable(
+            db, id, user_id, versions, obj_in.model_dump(exclude_unset=True)
+        )
+
+    @staticmethod
+    async def set_content(
+        db: AsyncSession,
+        id: int,
+        user_id: int,
+        content: ObjectInfo,
+        content_type: Optional[str],
+        filename: Optional[str],
+        versions: Optional[List[datetime]] = None,
+    ) -> Optional[models.Document]:
+        return await DocumentService._update_writable(db, id, user_id, versions, {
+            "s3_url": ContentService.url(content),
+            "content_digest": ContentService.digest(content),
+            "content_size": content.size,
+            "content_type": content_type,
+            "content_filename": filename,
+        })
+
+    @staticmethod
+    async def _update_writable(
+        db: AsyncSession,
+        id: int,
+        user_id: int,
+        versions: Optional[List[datetime]],
+        values: Dict[str, Any],
+    ) -> Optional[models.Document]:
+        stmt = update(models.Document).where(models.Document.id == id, DocumentService._writable_by(user_id))
+        if versions is not None:
+            stmt = stmt.where(models.Document.updated_at.in_(versions))
+        row = (await db.execute(
+            stmt.values(**values).returning(models.Document, DocumentService.audience())
+        )).first()
+        if row is None:
+            return None
+        db_obj, audience = row
+        await invalidation.publish(db, "document", id=id)
+        await search_cache.publish(db, audience or ())
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     @staticmethod
-    async def delete(db: AsyncSession, db_obj: models.Document) -> models.Document:
-        await db.delete(db_obj)
+    async def delete(
+        db: AsyncSession, id: int, owner_id: int, versions: Optional[List[datetime]] = None
+    ) -> Optional[models.Document]:
+        stmt = delete(models.Document).where(models.Document.id == id, models.Document.owner_id == owner_id)
+        if versions is not None:
+            stmt = stmt.where(models.Document.updated_at.in_(versions))
+        row = (await db.execute(stmt.returning(models.Document, DocumentService.audience()))).first()
+        if row is None:
+            return None
+        db_obj, audience = row
+        await invalidation.publish(db, "document", id=id)
+        await search_cache.publish(db, audience or ())
         await db.commit()
         return db_obj
 
     @staticmethod
-    async def search(
-        db: AsyncSession, 
+    def _writable_by(user_id: int):
+        direct = exists().where(
+            DocumentAccess.document_id == models.Document.id,
+            DocumentAccess.user_id == user_id,
+            DocumentAccess.permission >= int(AccessLevel.WRITE),
+        )
+        via_group = exists().where(
+            DocumentGroupShare.document_id == models.Document.id,
+            DocumentGroupShare.permission == PermissionType.WRITE,
+            GroupMembership.group_id == DocumentGroupShare.group_id,
+            GroupMembership.user_id == user_id,
+        )
+        return or_(direct, via_group)
+
+    @staticmethod
+    def audience():
+        direct = (
+            select(func.array_agg(DocumentAccess.user_id))
+            .where(DocumentAccess.document_id == models.Document.id)
+            .correlate(models.Document)
+            .scalar_subquery()
+        )
+        via_group = (
+            select(func.array_agg(GroupMembership.user_id))
+            .join(DocumentGroupShare, DocumentGroupShare.group_id == GroupMembership.group_id)
+            .where(DocumentGroupShare.document_id == models.Document.id)
+            .correlate(models.Document)
+            .scalar_subquery()
+        )
+        return func.array_cat(direct, via_group).label("audience")
+
+    @staticmethod
+    async def create_many(db: AsyncSession, docs_in: List[schemas.DocumentCreate], owner_id: int) -> List[models.Document]:
+        result = await db.scalars(
+            insert(models.Document).returning(models.Document, sort_by_parameter_order=True),
+            [{**doc_in.model_dump(), "owner_id": owner_id} for doc_in in docs_in],
+        )
+        db_objs = list(result.all())
+        await AccessIndexService.grant_owners(db, document_ids=[db_obj.id for db_obj in db_objs])
+        await search_cache.publish(db, [owner_id])
+        await db.commit()
+        return db_objs
+
+    @staticmethod
+    async def get_many(db: AsyncSession, ids: List[int], user_id: int) -> List[schemas.DocumentRow]:
+        query, _, id_col = await DocumentService._visible_query(db, user_id)
+        result = await db.execute(query.filter(id_col.in_(ids)).order_by(id_col))
+        return [dict(row) for row in result.mappings()]
+
+    @staticmethod
+    async def get_owner_ids(db: AsyncSession, ids: List[int]) -> Dict[int, int]:
+        result = await db.execute(
+            select(models.Document.id, models.Document.owner_id).filter(models.Document.id.in_(ids))
+        )
+        return dict(result.all())
+
+    @staticmethod
+    async def _visible_query(db: AsyncSession, user_id: int) -> Any:
+        group_ids = await GroupService.get_group_ids(db, user_id)
+        if group_ids:
+            visible = union(
+                select(DocumentAccess.document_id).filter(DocumentAccess.user_id == user_id),
+                select(DocumentGroupShare.document_id).filter(DocumentGroupShare.group_id.in_(group_ids)),
+            ).subquery("visible")
+            query = select(*DOCUMENT_COLUMNS).join(visible, visible.c.document_id == models.Document.id)
+            return query, models.Document.created_at, models.Document.id
+        query = select(*DOCUMENT_COLUMNS).join(
+            DocumentAccess,
+            and_(DocumentAccess.document_id == models.Document.id, DocumentAccess.user_id == user_id),
+        )
+        return query, DocumentAccess.created_at, DocumentAccess.document_id
+
+    @staticmethod
+    async def _filtered_query(
+        db: AsyncSession,
         user_id: int,
         q: Optional[str] = None,
         tags: Optional[List[str]] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        skip: int = 0,
-        limit: int = 10
+        mode: schemas.SearchMode = schemas.SearchMode.FTS,
     ) -> Any:
-        share_subquery = select(DocumentShare.document_id).filter(DocumentShare.user_id == user_id)
-        query = select(models.Document).filter(
-            or_(models.Document.owner_id == user_id, models.Document.id.in_(share_subquery))
-        )
-        
-        if q:
+        query, created_col, id_col = await DocumentService._visible_query(db, user_id)
+
+        ranking = None
+        if q and mode == schemas.SearchMode.FTS:
+            config = cast(literal(models.SEARCH_CONFIG), REGCONFIG)
+            ts_query = func.websearch_to_tsquery(config, q)
+            rank = func.ts_rank(models.Document.search_vector, ts_query)
+            headline = func.ts_headline(
+                config,
+                _escape_html(func.concat_ws(" ", models.Document.title, models.Document.description)),
+                ts_query,
+                HEADLINE_OPTIONS,
+            )
+            query = query.filter(models.Document.search_vector.bool_op("@@")(ts_query))
+            ranking = (rank, headline)
+        elif q:
             query = query.filter(or_(
                 models.Document.title.ilike(f"%{q}%"),
                 models.Document.description.ilike(f"%{q}%")
             ))
         if tags:
-            for t in tags:
-                query = query.filter(models.Document.tags.contains(t))
+            query = query.filter(models.Document.tags.contains(list(tags)))
         if start_date:
-            query = query.filter(models.Document.created_at >= start_date)
+            query = query.filter(created_col >= start_date)
         if end_date:
-            query = query.filter(models.Document.created_at <= end_date)
-            
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await db.scalar(count_query)
+            query = query.filter(created_col <= end_date)
+        return query, created_col, id_col, ranking
+
+    @staticmethod
+    async def search(
+        db: AsyncSession, 
+        user_id: int,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 10,
+        mode: schemas.SearchMode = schemas.SearchMode.FTS,
+        facets: Optional[List[schemas.SearchFacet]] = None,
+        cursor: Optional[str] = None,
+        count: schemas.CountMode = schemas.CountMode.EXACT,
+    ) -> Any:
+        query, created_col, id_col, ranking = await DocumentService._filtered_query(
+            db, user_id, q=q, tags=tags, start_date=start_date, end_date=end_date, mode=mode
+        )
+        ranked = ranking is not None
+        if ranked:
+            rank, headline = ranking
+
+        facet_counts = None
+        total, total_is_estimate = None, False
+        if facets and schemas.SearchFacet.TAGS in facets:
+            total, tag_counts = await DocumentService._count_with_tag_facets(db, query)
+            facet_counts = {schemas.SearchFacet.TAGS: tag_counts}
+        elif count == schemas.CountMode.EXACT:
+            count_query = select(func.count()).select_from(query.subquery())
+            total = await db.scalar(count_query)
+        elif count == schemas.CountMode.ESTIMATE:
+            total, total_is_estimate = await DocumentService._estimate_count(db, query)
         
-        result = await db.execute(query.offset(skip).limit(limit))
-        items = result.scalars().all()
-        return items, total
+        if ranked:
+            sort_kind, sort_key = "rank", rank
+            query = query.add_columns(rank.label("rank"), headline.label("highlight"))
+        else:
+            sort_kind, sort_key = "created_at", created_col
+        query = query.order_by(sort_key.desc(), id_col.desc())
+        if cursor:
+            sort_value, last_id = _decode_cursor(cursor, sort_kind)
+            query = query.filter(tuple_(sort_key, id_col) < tuple_(sort_value, last_id))
+            skip = 0
+
+        result = await db.execute(query.offset(skip).limit(limit + 1))
+        rows = result.mappings().all()
+        if ranked:
+            items = [dict(row) for row in rows[:limit]]
+        else:
+            items = [{**row, "rank": None, "highlight": None} for row in rows[:limit]]
+
+        has_more = len(rows) > limit
+        next_cursor = None
+        if has_more and items:
+            last = items[-1]
+            next_cursor = _encode_cursor(sort_kind, last["rank"] if ranked else last["created_at"], last["id"])
+        return {
+            "items": items,
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "has_more": has_more,
+            "facets": facet_counts,
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    async def export(
+        db: AsyncSession,
+        user_id: int,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        mode: schemas.SearchMode = schemas.SearchMode.FTS,
+    ) -> AsyncIterator[List[schemas.DocumentRow]]:
+        query, created_col, id_col, _ = await DocumentService._filtered_query(
+            db, user_id, q=q, tags=tags, start_date=start_date, end_date=end_date, mode=mode
+        )
+        result = await db.stream(
+            query.order_by(created_col.desc(), id_col.desc())
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        try:
+            async for rows in result.mappings().partitions():
+                yield [dict(row) for row in rows]
+        finally:
+            await result.close()
+
+    @staticmethod
+    async def _estimate_count(db: AsyncSession, query) -> Any:
+        capped = query.with_only_columns(models.Document.id).limit(COUNT_ESTIMATE_CAP + 1)
+        total = await db.scalar(select(func.count()).select_from(capped.subquery()))
+        if total <= COUNT_ESTIMATE_CAP:
+            return total, False
+        plan = await explain(db, query.with_only_columns(models.Document.id))
+        return max(int(plan["Plan Rows"]), COUNT_ESTIMATE_CAP), True
+
+    @staticmethod
+    async def _count_with_tag_facets(db: AsyncSession, query) -> Any:
+        filtered = query.with_only_columns(models.Document.id, models.Document.tags).cte("filtered")
+        tag_values = func.jsonb_array_elements_text(
+            case((func.jsonb_typeof(filtered.c.tags) == "array", filtered.c.tags))
+        ).table_valued("value").alias("tag")
+        tag_count = func.count().label("n")
+        facet_query = (
+            select(tag_values.c.value.label("tag"), tag_count)
+            .select_from(filtered)
+            .join(tag_values, true())
+            .group_by(tag_values.c.value)
+            .order_by(tag_count.desc(), tag_values.c.value)
+            .limit(FACET_LIMIT)
+            .subquery("facets")
+        )
+        total_query = select(func.count().label("n")).select_from(filtered).subquery("total")
+        result = await db.execute(
+            select(total_query.c.n, facet_query.c.tag, facet_query.c.n)
+            .select_from(total_query.outerjoin(facet_query, true()))
+            .order_by(facet_query.c.n.desc(), facet_query.c.tag)
+        )
+        rows = result.all()
+        total = rows[0][0] if rows else 0
+        return total, {tag: count for _, tag, count in rows if tag is not None}
@@ -0,0 +1,57 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.groups import schemas, service
+from app.core import dependencies
+from app.users.schemas import User
+from app.users.service import UserService
+
+router = APIRouter()
+
+@router.post("/", response_model=schemas.Group)
+async def create_group(
+    *,
+    db: AsyncSession = Depends(get_db),
+    group_in: schemas.GroupCreate,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    return await service.GroupService.create(db, group_in=group_in, owner_id=current_user.id)
+
+@router.post("/{id}/members", response_model=schemas.GroupMember)
+async def add_group_member(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id: int,
+    member_in: schemas.GroupMemberCreate,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    group = await service.GroupService.get(db, id=id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if group.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only owners can manage group members")
+    if not await UserService.get_existing_ids(db, ids=[member_in.user_id]):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    await service.GroupService.add_member(db, group_id=id, user_id=member_in.user_id)
+    return {"group_id": id, "user_id": member_in.user_id}
+
+@router.delete("/{id}/members/{user_id}")
+async def remove_group_member(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id: int,
+    user_id: int,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    group = await service.GroupService.get(db, id=id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if group.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only owners can manage group members")
+
+    if not await service.GroupService.remove_member(db, group_id=id, user_id=user_id):
+        raise HTTPException(status_code=404, detail="Membership not found")
+    return {"status": "success"}
@@ -0,0 +1,30 @@
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
+from app.db.session import Base
+from datetime import datetime
+from typing import List
+
+class Group(Base):
+    __tablename__ = "user_group"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+    memberships: Mapped[List["GroupMembership"]] = relationship("GroupMembership", back_populates="group", cascade="all, delete-orphan", passive_deletes=True)
+
+class GroupMembership(Base):
+    __tablename__ = "group_membership"
+    __table_args__ = (
+        Index("ix_group_membership_user_id_group_id", "user_id", "group_id"),
+    )
+
+    group_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_group.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+    group: Mapped["Group"] = relationship("Group", back_populates="memberships")
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class GroupBase(BaseModel):
+    name: str
+
+class GroupCreate(GroupBase):
+    pass
+
+class Group(GroupBase):
+    id: int
+    owner_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class GroupMemberCreate(BaseModel):
+    user_id: int
+
+class GroupMember(BaseModel):
+    group_id: int
+    user_id: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,73 @@
+from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, and_
+from sqlalchemy.dialects.postgresql import insert
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.documents import search_cache
+from app.groups import models, schemas
+
+membership_cache = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL_SECONDS,
+)
+invalidation.register(
+    "membership",
+    lambda data: membership_cache.pop(data["user_id"]),
+    membership_cache.clear,
+)
+
+class GroupService:
+    @staticmethod
+    async def get(db: AsyncSession, id: int) -> Optional[models.Group]:
+        result = await db.execute(select(models.Group).filter(models.Group.id == id))
+        return result.scalars().first()
+
+    @staticmethod
+    async def create(db: AsyncSession, group_in: schemas.GroupCreate, owner_id: int) -> models.Group:
+        db_obj = await db.scalar(
+            insert(models.Group)
+            .values(**group_in.model_dump(), owner_id=owner_id)
+            .returning(models.Group)
+        )
+        await db.execute(insert(models.GroupMembership).values(group_id=db_obj.id, user_id=owner_id))
+        await invalidation.publish(db, "membership", user_id=owner_id)
+        await db.commit()
+        return db_obj
+
+    @staticmethod
+    async def add_member(db: AsyncSession, group_id: int, user_id: int) -> None:
+        await db.execute(
+            insert(models.GroupMembership)
+            .values(group_id=group_id, user_id=user_id)
+            .on_conflict_do_nothing()
+        )
+        await invalidation.publish(db, "membership", user_id=user_id)
+        await search_cache.publish(db, [user_id])
+        await db.commit()
+
+    @staticmethod
+    async def remove_member(db: AsyncSession, group_id: int, user_id: int) -> bool:
+        result = await db.execute(
+            delete(models.GroupMembership).where(
+                and_(models.GroupMembership.group_id == group_id, models.GroupMembership.user_id == user_id)
+            )
+        )
+        await invalidation.publish(db, "membership", user_id=user_id)
+        await search_cache.publish(db, [user_id])
+        await db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    async def get_group_ids(db: AsyncSession, user_id: int) -> Tuple[int, ...]:
+        group_ids = membership_cache.get(user_id)
+        if group_ids is None:
+            result = await db.execute(
+                select(models.GroupMembership.group_id)
+                .filter(models.GroupMembership.user_id == user_id)
+                .order_by(models.GroupMembership.group_id)
+            )
+            group_ids = tuple(result.scalars().all())
+            membership_cache.set(user_id, group_ids)
+        return group_ids
@@ -1,15 +1,90 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import invalidation, metrics
+from app.core.cache import principal_cache, register_cache_metrics
 from app.core.config import settings
-from app.core.middleware import LoggingMiddleware
+from app.core.logs import configure_logging, shutdown_logging
+from app.core.revocation import revocation_list
+from app.core.security import password_hasher
+from app.db.session import AsyncSessionLocal, engine
+from app.core.middleware import LoggingMiddleware, MetricsMiddleware, ReadYourWritesMiddleware
 from app.users.api import router as user_router
+from app.users.service import TokenService, resume_purges
 from app.documents.api import router as document_router
+from app.documents.previews import preview_pool
 from app.shares.api import router as share_router
+from app.groups.api import router as group_router
+from app.documents.search_cache import search_cache
+from app.documents.service import document_cache
+from app.groups.service import membership_cache
+from app.shares.permissions import group_permission_cache, permission_cache
+
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+async def refresh_revocations() -> None:
+    while True:
+        await asyncio.sleep(settings.REVOCATION_REFRESH_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                await revocation_list.refresh(db)
+                await TokenService.purge_expired(db)
+        except Exception:
+            logger.exception("Failed to refresh token revocation list")
+
+
+async def resume_account_purges() -> None:
+    while True:
+        await asyncio.sleep(settings.ACCOUNT_PURGE_RETRY_SECONDS)
+        try:
+            # Only requests older than one period, so purges still running in-process are left alone.
+            resumed = await resume_purges(engine, settings.ACCOUNT_PURGE_RETRY_SECONDS)
+            if resumed:
+                logger.info("Resumed %d pending account purges", resumed)
+        except Exception:
+            logger.exception("Failed to resume pending account purges")
+
+
+async def flush_metrics(directory: str) -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        try:
+            metrics.write_snapshot(directory)
+        except OSError:
+            logger.exception("Failed to write metrics snapshot")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with AsyncSessionLocal() as db:
+        await revocation_list.load(db)
+    background = [
+        asyncio.create_task(refresh_revocations()),
+        asyncio.create_task(invalidation.listen(engine)),
+        asyncio.create_task(resume_account_purges()),
+    ]
+    if settings.METRICS_MULTIPROCESS_DIR:
+        background.append(asyncio.create_task(flush_metrics(settings.METRICS_MULTIPROCESS_DIR)))
+    yield
+    for task in background:
+        task.cancel()
+    for task in background:
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hasher.shutdown()
+    preview_pool.shutdown()
+    shutdown_logging()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 
@@ -23,6 +98,8 @@ app.add_middleware(
 
 
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 
 
 app.include_router(
@@ -40,8 +117,29 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/shares", 
     tags=["Sharing & Permissions"],
 )
+app.include_router(
+    group_router, 
+    prefix=f"{settings.API_V1_STR}/groups", 
+    tags=["Groups"],
+)
+
+
+register_cache_metrics({
+    "principal": principal_cache,
+    "document": document_cache,
+    "permission": permission_cache,
+    "group_permission": group_permission_cache,
+    "membership": membership_cache,
+    "search": search_cache,
+})
 
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Document Management API", "docs": "/docs"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return Response(content=metrics.render(metrics.collect()), media_type="text/plain; version=0.0.4")
+
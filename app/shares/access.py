@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from sqlalchemy import select, delete, and_, case, func, literal, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.db.base  # noqa: F401  registers every mapper for the CLI
+from app.db.session import AsyncSessionLocal
+from app.documents.models import Document
+from app.shares.models import AccessLevel, DocumentAccess, DocumentShare, PermissionType, SHARE_ACCESS
+
+ACCESS_COLUMNS = ["user_id", "document_id", "permission", "created_at"]
+
+
+def _share_level(permission):
+    return case(
+        (permission == PermissionType.WRITE.value, int(AccessLevel.WRITE)),
+        else_=int(AccessLevel.READ),
+    )
+
+
+class AccessIndexService:
+    @staticmethod
+    async def grant_owners(db: AsyncSession, document_ids: List[int]) -> None:
+        await db.execute(
+            insert(DocumentAccess).from_select(
+                ACCESS_COLUMNS,
+                select(Document.owner_id, Document.id, literal(int(AccessLevel.OWNER)), Document.created_at)
+                .filter(Document.id.in_(document_ids)),
+            )
+        )
+
+    @staticmethod
+    async def grant_share(db: AsyncSession, document_id: int, user_id: int, permission: PermissionType) -> None:
+        stmt = insert(DocumentAccess).from_select(
+            ACCESS_COLUMNS,
+            select(literal(user_id), Document.id, literal(int(SHARE_ACCESS[permission])), Document.created_at)
+            .filter(Document.id == document_id),
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DocumentAccess.user_id, DocumentAccess.document_id],
+                set_={"permission": func.greatest(DocumentAccess.permission, stmt.excluded.permission)},
+            )
+        )
+
+    @staticmethod
+    async def grant_shares(db: AsyncSession, share_ids: List[int]) -> None:
+        stmt = insert(DocumentAccess).from_select(
+            ACCESS_COLUMNS,
+            select(
+                DocumentShare.user_id,
+                DocumentShare.document_id,
+                _share_level(DocumentShare.permission),
+                Document.created_at,
+            )
+            .join(Document, Document.id == DocumentShare.document_id)
+            .filter(DocumentShare.id.in_(share_ids)),
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DocumentAccess.user_id, DocumentAccess.document_id],
+                set_={"permission": func.greatest(DocumentAccess.permission, stmt.excluded.permission)},
+            )
+        )
+
+    @staticmethod
+    async def revoke_share(db: AsyncSession, document_id: int, user_id: int) -> None:
+        await db.execute(
+            delete(DocumentAccess).where(
+                and_(
+                    DocumentAccess.document_id == document_id,
+                    DocumentAccess.user_id == user_id,
+                    DocumentAccess.permission < AccessLevel.OWNER,
+                )
+            )
+        )
+
+    @staticmethod
+    def expected_rows():
+        owners = select(
+            Document.owner_id.label("user_id"),
+            Document.id.label("document_id"),
+            literal(int(AccessLevel.OWNER)).label("permission"),
+            Document.created_at.label("created_at"),
+        )
+        shares = (
+            select(
+                DocumentShare.user_id,
+                DocumentShare.document_id,
+                func.max(_share_level(DocumentShare.permission)),
+                Document.created_at,
+            )
+            .join(Document, Document.id == DocumentShare.document_id)
+            .filter(DocumentShare.user_id != Document.owner_id)
+            .group_by(DocumentShare.user_id, DocumentShare.document_id, Document.created_at)
+        )
+        return union_all(owners, shares)
+
+    @staticmethod
+    async def verify(db: AsyncSession) -> Dict[str, Any]:
+        expected = AccessIndexService.expected_rows().subquery("expected")
+        actual = select(
+            DocumentAccess.user_id, DocumentAccess.document_id,
+            DocumentAccess.permission, DocumentAccess.created_at,
+        )
+        expected_rows = select(expected.c.user_id, expected.c.document_id, expected.c.permission, expected.c.created_at)
+        missing = await db.scalar(
+            select(func.count()).select_from(expected_rows.except_(actual).subquery())
+        )
+        unexpected = await db.scalar(
+            select(func.count()).select_from(actual.except_(expected_rows).subquery())
+        )
+        return {"missing": missing, "unexpected": unexpected, "in_sync": missing == 0 and unexpected == 0}
+
+    @staticmethod
+    async def rebuild(db: AsyncSession) -> None:
+        await db.execute(delete(DocumentAccess))
+        await db.execute(
+            insert(DocumentAccess).from_select(ACCESS_COLUMNS, AccessIndexService.expected_rows())
+        )
+        await db.commit()
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Verify or rebuild the document_access index.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        if args.command == "rebuild":
+            await AccessIndexService.rebuild(db)
+        report = await AccessIndexService.verify(db)
+    print(f"missing={report['missing']} unexpected={report['unexpected']}")
+    return 0 if report["in_sync"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
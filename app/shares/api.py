@@ -1,12 +1,15 @@
-from typing import Any
+from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.shares import schemas, service
+from app.shares.permissions import AccessLevel, PermissionResolver
+from app.groups.service import GroupService
 from app.documents.service import DocumentService
+from app.users.service import UserService
 from app.core import dependencies
-from app.users.models import User
+from app.users.schemas import User
 
 router = APIRouter()
 
@@ -18,21 +21,116 @@ async def share_document(
     current_user: User = Depends(dependencies.get_current_user)
 ) -> Any:
 
-    document = await DocumentService.get(db, id=share_in.document_id)
+    document, access = await PermissionResolver.resolve(
+        db, document_id=share_in.document_id, user_id=current_user.id
+    )
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
         
-    if document.owner_id != current_user.id:
+    if access < AccessLevel.OWNER:
         raise HTTPException(status_code=403, detail="Only owners can share documents")
         
+    share = await service.ShareService.create(db, share_in=share_in)
+    if not share:
+        raise HTTPException(status_code=400, detail="Document already shared with this user")
+    return share
 
-    existing = await service.ShareService.get_existing(
-        db, document_id=share_in.document_id, user_id=share_in.user_id
+@router.post("/batch", response_model=List[schemas.DocumentShareBatchResult])
+async def share_documents_batch(
+    *,
+    db: AsyncSession = Depends(get_db),
+    batch_in: schemas.DocumentShareBatchCreate,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    items = batch_in.items
+    owners = await DocumentService.get_owner_ids(db, ids=list({item.document_id for item in items}))
+    users = await UserService.get_existing_ids(db, ids=list({item.user_id for item in items}))
+    existing = await service.ShareService.get_existing_pairs(
+        db, pairs=list({(item.document_id, item.user_id) for item in items})
     )
-    if existing:
-        raise HTTPException(status_code=400, detail="Document already shared with this user")
 
-    return await service.ShareService.create(db, share_in=share_in)
+    results, accepted, seen = {}, [], set()
+    for index, item in enumerate(items):
+        pair = (item.document_id, item.user_id)
+        if item.document_id not in owners:
+            results[index] = {"status_code": 404, "detail": "Document not found"}
+        elif owners[item.document_id] != current_user.id:
+            results[index] = {"status_code": 403, "detail": "Only owners can share documents"}
+        elif item.user_id not in users:
+            results[index] = {"status_code": 404, "detail": "User not found"}
+        elif pair in existing or pair in seen:
+            results[index] = {"status_code": 400, "detail": "Document already shared with this user"}
+        else:
+            seen.add(pair)
+            accepted.append((index, item))
+
+    if accepted:
+        shares = {
+            (share.document_id, share.user_id): share
+            for share in await service.ShareService.create_many(db, shares_in=[item for _, item in accepted])
+        }
+        skipped = [item for _, item in accepted if (item.document_id, item.user_id) not in shares]
+        if skipped:
+            existing = await service.ShareService.get_existing_pairs(
+                db, pairs=[(item.document_id, item.user_id) for item in skipped]
+            )
+            users = await UserService.get_existing_ids(db, ids=list({item.user_id for item in skipped}))
+        for index, item in accepted:
+            pair = (item.document_id, item.user_id)
+            if pair in shares:
+                results[index] = {"status_code": 201, "share": shares[pair]}
+            elif pair in existing:
+                results[index] = {"status_code": 400, "detail": "Document already shared with this user"}
+            elif item.user_id not in users:
+                results[index] = {"status_code": 404, "detail": "User not found"}
+            else:
+                results[index] = {"status_code": 404, "detail": "Document not found"}
+
+    return [{"index": index, **results[index]} for index in range(len(items))]
+
+@router.post("/groups/", response_model=schemas.DocumentGroupShare)
+async def share_document_with_group(
+    *,
+    db: AsyncSession = Depends(get_db),
+    share_in: schemas.DocumentGroupShareCreate,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    document, access = await PermissionResolver.resolve(
+        db, document_id=share_in.document_id, user_id=current_user.id
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if access < AccessLevel.OWNER:
+        raise HTTPException(status_code=403, detail="Only owners can share documents")
+
+    if not await GroupService.get(db, id=share_in.group_id):
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    share = await service.ShareService.create_group_share(db, share_in=share_in)
+    if not share:
+        raise HTTPException(status_code=400, detail="Document already shared with this group")
+    return share
+
+@router.delete("/groups/{id}")
+async def unshare_document_with_group(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id: int,
+    current_user: User = Depends(dependencies.get_current_user)
+) -> Any:
+    share = await service.ShareService.get_group_share_by_id(db, id=id)
+    if not share:
+        raise HTTPException(status_code=404, detail="Share record not found")
+
+    document, access = await PermissionResolver.resolve(
+        db, document_id=share.document_id, user_id=current_user.id
+    )
+    if access < AccessLevel.OWNER:
+        raise HTTPException(status_code=403, detail="Only owners can revoke access")
+
+    await service.ShareService.delete_group_share(db, db_obj=share)
+    return {"status": "success"}
 
 @router.delete("/{id}")
 async def unshare_document(
@@ -45,8 +143,10 @@ async def unshare_document(
     if not share:
         raise HTTPException(status_code=404, detail="Share record not found")
         
-    document = await DocumentService.get(db, id=share.document_id)
-    if document.owner_id != current_user.id:
+    document, access = await PermissionResolver.resolve(
+        db, document_id=share.document_id, user_id=current_user.id
+    )
+    if access < AccessLevel.OWNER:
         raise HTTPException(status_code=403, detail="Only owners can revoke access")
         
     await service.ShareService.delete(db, db_obj=share)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum
+from sqlalchemy import String, Integer, SmallInteger, DateTime, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -9,15 +9,61 @@ class PermissionType(str, enum.Enum):
     READ = "read"
     WRITE = "write"
 
+class AccessLevel(enum.IntEnum):
+    NONE = 0
+    READ = 1
+    WRITE = 2
+    OWNER = 3
+
+SHARE_ACCESS = {
+    PermissionType.READ: AccessLevel.READ,
+    PermissionType.WRITE: AccessLevel.WRITE,
+}
+
 class DocumentShare(Base):
     __tablename__ = "document_share"
+    __table_args__ = (
+        UniqueConstraint("document_id", "user_id", name="uq_document_share_document_id_user_id"),
+        Index("ix_document_share_user_id_document_id", "user_id", "document_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    document_id: Mapped[int] = mapped_column(Integer, ForeignKey("document.id"), nullable=False)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False)
+    document_id: Mapped[int] = mapped_column(Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     permission: Mapped[PermissionType] = mapped_column(String, nullable=False, default=PermissionType.READ)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
 
     document: Mapped["Document"] = relationship("Document", back_populates="shares")
     user: Mapped["User"] = relationship("User", back_populates="shares_received")
+
+
+class DocumentGroupShare(Base):
+    __tablename__ = "document_group_share"
+    __table_args__ = (
+        UniqueConstraint("document_id", "group_id", name="uq_document_group_share_document_id_group_id"),
+        Index("ix_document_group_share_group_id_document_id", "group_id", "document_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    document_id: Mapped[int] = mapped_column(Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=False)
+    group_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_group.id", ondelete="CASCADE"), nullable=False)
+    permission: Mapped[PermissionType] = mapped_column(String, nullable=False, default=PermissionType.READ)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+    document: Mapped["Document"] = relationship("Document", back_populates="group_shares")
+
+
+class DocumentAccess(Base):
+    __tablename__ = "document_access"
+    __table_args__ = (
+        Index("ix_document_access_user_id_created_at", "user_id", "created_at", "document_id"),
+        Index("ix_document_access_document_id", "document_id"),
+    )
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    document_id: Mapped[int] = mapped_column(Integer, ForeignKey("document.id", ondelete="CASCADE"), primary_key=True)
+    permission: Mapped[AccessLevel] = mapped_column(SmallInteger, nullable=False)
+    # Mirrors document.created_at so visibility + ordering is one index range.
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,126 @@
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.replicas import is_replica
+from app.documents import schemas as document_schemas
+from app.documents.models import Document
+from app.documents.service import DocumentService, document_cache
+from app.groups.service import GroupService
+from app.shares.models import AccessLevel, DocumentAccess, DocumentGroupShare, SHARE_ACCESS
+
+permission_cache = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL_SECONDS,
+)
+invalidation.register(
+    "share",
+    lambda data: permission_cache.pop((data["document_id"], data["user_id"])),
+    permission_cache.clear,
+)
+group_permission_cache = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL_SECONDS,
+)
+invalidation.register(
+    "group_share",
+    lambda data: group_permission_cache.pop((data["document_id"], data["group_id"])),
+    group_permission_cache.clear,
+)
+
+class PermissionResolver:
+    @staticmethod
+    async def resolve(
+        db: AsyncSession, document_id: int, user_id: int
+    ) -> Tuple[Optional[document_schemas.Document], AccessLevel]:
+        key = (document_id, user_id)
+        document = document_cache.get(document_id)
+        if document is None:
+            result = await db.execute(
+                select(Document, DocumentAccess.permission)
+                .outerjoin(
+                    DocumentAccess,
+                    and_(DocumentAccess.document_id == Document.id, DocumentAccess.user_id == user_id),
+                )
+                .filter(Document.id == document_id)
+            )
+            row = result.first()
+            if row is None:
+                return None, AccessLevel.NONE
+            document = DocumentService.cache(db, row[0])
+            if document.owner_id == user_id:
+                return document, AccessLevel.OWNER
+            access = AccessLevel(row.permission or AccessLevel.NONE)
+            if not is_replica(db):
+                permission_cache.set(key, access)
+        elif document.owner_id == user_id:
+            return document, AccessLevel.OWNER
+        else:
+            access = permission_cache.get(key)
+            if access is None:
+                permission = await db.scalar(
+                    select(DocumentAccess.permission).filter(
+                        and_(DocumentAccess.document_id == document_id, DocumentAccess.user_id == user_id)
+                    )
+                )
+                access = AccessLevel(permission or AccessLevel.NONE)
+                if not is_replica(db):
+                    permission_cache.set(key, access)
+
+        return document, await PermissionResolver._with_group_access(db, document_id, user_id, access)
+
+    @staticmethod
+    async def resolve_version(
+        db: AsyncSession, document_id: int, user_id: int
+    ) -> Tuple[Optional[datetime], AccessLevel]:
+        if document_cache.get(document_id) is not None:
+            document, access = await PermissionResolver.resolve(db, document_id, user_id)
+            return document.updated_at, access
+
+        result = await db.execute(
+            select(Document.owner_id, Document.updated_at, DocumentAccess.permission)
+            .outerjoin(
+                DocumentAccess,
+                and_(DocumentAccess.document_id == Document.id, DocumentAccess.user_id == user_id),
+            )
+            .filter(Document.id == document_id)
+        )
+        row = result.first()
+        if row is None:
+            return None, AccessLevel.NONE
+        if row.owner_id == user_id:
+            return row.updated_at, AccessLevel.OWNER
+        access = AccessLevel(row.permission or AccessLevel.NONE)
+        if not is_replica(db):
+            permission_cache.set((document_id, user_id), access)
+        return row.updated_at, await PermissionResolver._with_group_access(db, document_id, user_id, access)
+
+    @staticmethod
+    async def _with_group_access(db: AsyncSession, document_id: int, user_id: int, access: AccessLevel) -> AccessLevel:
+        if access < AccessLevel.WRITE:
+            group_ids = await GroupService.get_group_ids(db, user_id)
+            if group_ids:
+                access = max(access, await PermissionResolver._group_access(db, document_id, group_ids))
+        return access
+
+    @staticmethod
+    async def _group_access(db: AsyncSession, document_id: int, group_ids: Sequence[int]) -> AccessLevel:
+        levels = {group_id: group_permission_cache.get((document_id, group_id)) for group_id in group_ids}
+        missing = [group_id for group_id, level in levels.items() if level is None]
+        if missing:
+            result = await db.execute(
+                select(DocumentGroupShare.group_id, DocumentGroupShare.permission).filter(
+                    and_(DocumentGroupShare.document_id == document_id, DocumentGroupShare.group_id.in_(missing))
+                )
+            )
+            found = {group_id: SHARE_ACCESS[permission] for group_id, permission in result.all()}
+            for group_id in missing:
+                levels[group_id] = found.get(group_id, AccessLevel.NONE)
+                if not is_replica(db):
+                    group_permission_cache.set((document_id, group_id), levels[group_id])
+        return max(levels.values())
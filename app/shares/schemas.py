@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.core.config import settings
 from app.shares.models import PermissionType
 from datetime import datetime
 
@@ -10,6 +12,9 @@ class DocumentShareBase(BaseModel):
 class DocumentShareCreate(DocumentShareBase):
     pass
 
+class DocumentShareBatchCreate(BaseModel):
+    items: List[DocumentShareCreate] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
 class DocumentShareUpdate(BaseModel):
     permission: PermissionType
 
@@ -19,3 +24,22 @@ class DocumentShare(DocumentShareBase):
 
     class Config:
         from_attributes = True
+
+
+class DocumentShareBatchResult(BaseModel):
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    share: Optional[DocumentShare] = None
+
+class DocumentGroupShareCreate(BaseModel):
+    document_id: int
+    group_id: int
+    permission: PermissionType = PermissionType.READ
+
+class DocumentGroupShare(DocumentGroupShareCreate):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
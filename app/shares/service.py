@@ -1,7 +1,22 @@
-from typing import Any, Optional
+from typing import Any, List, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import Integer, String, column, select, delete, func, tuple_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core import invalidation
+from app.documents import search_cache
+from app.documents.models import Document
+from app.groups.models import GroupMembership
 from app.shares import models, schemas
+from app.shares.access import AccessIndexService
+from app.users.models import User
+
+def _group_members():
+    return (
+        select(func.array_agg(GroupMembership.user_id))
+        .where(GroupMembership.group_id == models.DocumentGroupShare.group_id)
+        .correlate(models.DocumentGroupShare)
+        .scalar_subquery()
+    )
 
 class ShareService:
     @staticmethod
@@ -10,25 +25,100 @@ class ShareService:
         return result.scalars().first()
 
     @staticmethod
-    async def get_existing(db: AsyncSession, document_id: int, user_id: int) -> Optional[models.DocumentShare]:
-        query = select(models.DocumentShare).filter(
-            and_(
-                models.DocumentShare.document_id == document_id,
-                models.DocumentShare.user_id == user_id
+    async def get_existing_pairs(db: AsyncSession, pairs: List[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+        if not pairs:
+            return set()
+        result = await db.execute(
+            select(models.DocumentShare.document_id, models.DocumentShare.user_id).filter(
+                tuple_(models.DocumentShare.document_id, models.DocumentShare.user_id).in_(pairs)
             )
         )
-        result = await db.execute(query)
-        return result.scalars().first()
+        return {tuple(row) for row in result.all()}
 
     @staticmethod
-    async def create(db: AsyncSession, share_in: schemas.DocumentShareCreate) -> models.DocumentShare:
-        db_obj = models.DocumentShare(**share_in.model_dump())
-        db.add(db_obj)
+    async def create_many(db: AsyncSession, shares_in: List[schemas.DocumentShareCreate]) -> List[models.DocumentShare]:
+        # Rows lost to a concurrent share or to a recipient/document deleted since
+        # validation are skipped, not raised; callers match results by pair.
+        items = values(
+            column("document_id", Integer), column("user_id", Integer), column("permission", String), name="items"
+        ).data([(share_in.document_id, share_in.user_id, share_in.permission.value) for share_in in shares_in])
+        result = await db.scalars(
+            pg_insert(models.DocumentShare)
+            .from_select(
+                ["document_id", "user_id", "permission"],
+                select(items.c.document_id, items.c.user_id, items.c.permission)
+                .join(User, User.id == items.c.user_id)
+                .join(Document, Document.id == items.c.document_id)
+                .with_for_update(key_share=True, of=[User, Document]),
+            )
+            .on_conflict_do_nothing(constraint="uq_document_share_document_id_user_id")
+            .returning(models.DocumentShare)
+        )
+        db_objs = list(result.all())
+        await AccessIndexService.grant_shares(db, share_ids=[db_obj.id for db_obj in db_objs])
+        await invalidation.publish_many(
+            db, "share", [{"document_id": db_obj.document_id, "user_id": db_obj.user_id} for db_obj in db_objs]
+        )
+        await search_cache.publish(db, [db_obj.user_id for db_obj in db_objs])
+        await db.commit()
+        return db_objs
+
+    @staticmethod
+    async def create(db: AsyncSession, share_in: schemas.DocumentShareCreate) -> Optional[models.DocumentShare]:
+        db_obj = await db.scalar(
+            pg_insert(models.DocumentShare)
+            .values(**share_in.model_dump())
+            .on_conflict_do_nothing(constraint="uq_document_share_document_id_user_id")
+            .returning(models.DocumentShare)
+        )
+        if db_obj is None:
+            return None
+        await AccessIndexService.grant_share(
+            db, document_id=db_obj.document_id, user_id=db_obj.user_id, permission=db_obj.permission
+        )
+        await invalidation.publish(db, "share", document_id=db_obj.document_id, user_id=db_obj.user_id)
+        await search_cache.publish(db, [db_obj.user_id])
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     @staticmethod
     async def delete(db: AsyncSession, db_obj: models.DocumentShare) -> None:
+        await AccessIndexService.revoke_share(db, document_id=db_obj.document_id, user_id=db_obj.user_id)
         await db.delete(db_obj)
+        await invalidation.publish(db, "share", document_id=db_obj.document_id, user_id=db_obj.user_id)
+        await search_cache.publish(db, [db_obj.user_id])
+        await db.commit()
+
+    @staticmethod
+    async def get_group_share_by_id(db: AsyncSession, id: int) -> Optional[models.DocumentGroupShare]:
+        result = await db.execute(select(models.DocumentGroupShare).filter(models.DocumentGroupShare.id == id))
+        return result.scalars().first()
+
+    @staticmethod
+    async def create_group_share(
+        db: AsyncSession, share_in: schemas.DocumentGroupShareCreate
+    ) -> Optional[models.DocumentGroupShare]:
+        row = (await db.execute(
+            pg_insert(models.DocumentGroupShare)
+            .values(**share_in.model_dump())
+            .on_conflict_do_nothing(constraint="uq_document_group_share_document_id_group_id")
+            .returning(models.DocumentGroupShare, _group_members())
+        )).first()
+        if row is None:
+            return None
+        db_obj, members = row
+        await invalidation.publish(db, "group_share", document_id=db_obj.document_id, group_id=db_obj.group_id)
+        await search_cache.publish(db, members or ())
+        await db.commit()
+        return db_obj
+
+    @staticmethod
+    async def delete_group_share(db: AsyncSession, db_obj: models.DocumentGroupShare) -> None:
+        members = await db.scalar(
+            delete(models.DocumentGroupShare)
+            .where(models.DocumentGroupShare.id == db_obj.id)
+            .returning(_group_members())
+        )
+        await invalidation.publish(db, "group_share", document_id=db_obj.document_id, group_id=db_obj.group_id)
+        await search_cache.publish(db, members or ())
         await db.commit()
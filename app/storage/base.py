@@ -0,0 +1,53 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    key: str
+    size: int
+
+
+class Upload(ABC):
+    """An object being written in parts; it only becomes visible under a key on complete()."""
+
+    @abstractmethod
+    async def write(self, chunk: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def complete(self, key: str) -> ObjectInfo:
+        ...
+
+    @abstractmethod
+    async def abort(self) -> None:
+        ...
+
+
+class ObjectStore(ABC):
+    """The subset of the S3 object API the application relies on."""
+
+    @abstractmethod
+    async def create_upload(self) -> Upload:
+        ...
+
+    @abstractmethod
+    async def head_object(self, key: str) -> Optional[ObjectInfo]:
+        ...
+
+    @abstractmethod
+    def get_object(self, key: str, offset: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        ...
+
+    @abstractmethod
+    async def delete_object(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    def local_path(self, key: str) -> Optional[str]:
+        """A filesystem path for the object, for backends that can serve it with sendfile."""
+        return None
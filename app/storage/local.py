@@ -0,0 +1,95 @@
+import os
+import tempfile
+from typing import AsyncIterator, BinaryIO, Optional
+
+from anyio import to_thread
+
+from app.storage.base import ObjectInfo, ObjectStore, Upload
+
+
+class LocalUpload(Upload):
+    def __init__(self, store: "LocalObjectStore", file: BinaryIO):
+        self.store = store
+        self.size = 0
+        self._file = file
+
+    async def write(self, chunk: bytes) -> None:
+        await to_thread.run_sync(self._file.write, chunk)
+        self.size += len(chunk)
+
+    async def complete(self, key: str) -> ObjectInfo:
+        await to_thread.run_sync(self._complete, self.store.path(key))
+        return ObjectInfo(key=key, size=self.size)
+
+    async def abort(self) -> None:
+        await to_thread.run_sync(self._discard)
+
+    def _complete(self, path: str) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._file.name, path)
+
+    def _discard(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._file.name)
+        except FileNotFoundError:
+            pass
+
+
+class LocalObjectStore(ObjectStore):
+    def __init__(self, root: str, bucket: str, chunk_size: int):
+        self.root = os.path.abspath(root)
+        self.bucket = bucket
+        self.chunk_size = chunk_size
+        self._tmp = os.path.join(self.root, ".uploads")
+
+    def path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, self.bucket, key))
+        if not path.startswith(os.path.join(self.root, self.bucket) + os.sep):
+            raise ValueError(f"Invalid object key: {key!r}")
+        return path
+
+    async def create_upload(self) -> LocalUpload:
+        os.makedirs(self._tmp, exist_ok=True)
+        file = await to_thread.run_sync(
+            lambda: tempfile.NamedTemporaryFile(dir=self._tmp, delete=False)
+        )
+        return LocalUpload(self, file)
+
+    async def head_object(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            stat = await to_thread.run_sync(os.stat, self.path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(key=key, size=stat.st_size)
+
+    async def get_object(self, key: str, offset: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        file = await to_thread.run_sync(open, self.path(key), "rb")
+        try:
+            await to_thread.run_sync(file.seek, offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await to_thread.run_sync(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await to_thread.run_sync(file.close)
+
+    async def delete_object(self, key: str) -> None:
+        try:
+            await to_thread.run_sync(os.unlink, self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path(key)
+
+    def url(self, key: str) -> str:
+        return f"local://{self.bucket}/{key}"
@@ -0,0 +1,76 @@
+import hashlib
+from typing import AsyncIterator, Optional
+
+from anyio import CancelScope, to_thread
+
+from app.core.config import settings
+from app.storage.base import ObjectInfo, ObjectStore
+from app.storage.local import LocalObjectStore
+
+DIGEST_ALGORITHM = "sha256"
+
+
+class ContentTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+
+def create_object_store() -> ObjectStore:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalObjectStore(
+            root=settings.STORAGE_ROOT,
+            bucket=settings.STORAGE_BUCKET,
+            chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        )
+    raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND!r}")
+
+
+object_store = create_object_store()
+
+
+def content_key(digest: str) -> str:
+    return f"{DIGEST_ALGORITHM}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class ContentService:
+    @staticmethod
+    async def store(chunks: AsyncIterator[bytes], max_bytes: int) -> ObjectInfo:
+        """Stream chunks into the store under their content digest, keeping one copy per digest."""
+        hasher = hashlib.new(DIGEST_ALGORITHM)
+        upload = await object_store.create_upload()
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ContentTooLarge(max_bytes)
+                await to_thread.run_sync(hasher.update, chunk)
+                await upload.write(chunk)
+
+            key = content_key(hasher.hexdigest())
+            existing = await object_store.head_object(key)
+            if existing is not None:
+                await upload.abort()
+                return existing
+            return await upload.complete(key)
+        except BaseException:
+            with CancelScope(shield=True):
+                await upload.abort()
+            raise
+
+    @staticmethod
+    def digest(info: ObjectInfo) -> str:
+        return info.key.rsplit("/", 1)[-1]
+
+    @staticmethod
+    def url(info: ObjectInfo) -> str:
+        return object_store.url(info.key)
+
+    @staticmethod
+    def local_path(digest: str) -> Optional[str]:
+        return object_store.local_path(content_key(digest))
+
+    @staticmethod
+    def read(digest: str) -> AsyncIterator[bytes]:
+        return object_store.get_object(content_key(digest))
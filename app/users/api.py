@@ -1,6 +1,6 @@
 from datetime import timedelta
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -30,9 +30,51 @@ async def login_access_token(
         "access_token": security.create_access_token(
             user.id, expires_delta=access_token_expires
         ),
+        "refresh_token": security.create_refresh_token(user.id),
         "token_type": "bearer",
     }
 
+@router.post("/login/refresh-token", response_model=schemas.Token)
+async def refresh_access_token(
+    *,
+    db: AsyncSession = Depends(get_db),
+    token_in: schemas.TokenRefresh,
+) -> Any:
+    token_data = dependencies.decode_token_payload(
+        token_in.refresh_token, token_type=security.REFRESH_TOKEN_TYPE
+    )
+    user = await service.UserService.get_by_id(db, user_id=token_data.sub)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    elif not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    if not await service.TokenService.revoke(db, token_data):
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    return {
+        "access_token": security.create_access_token(user.id),
+        "refresh_token": security.create_refresh_token(user.id),
+        "token_type": "bearer",
+    }
+
+@router.post("/logout")
+async def logout(
+    *,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(dependencies.reusable_oauth2),
+    token_in: Optional[schemas.TokenRefresh] = None,
+    current_user: schemas.User = Depends(dependencies.get_current_user),
+) -> Any:
+    await service.TokenService.revoke(db, dependencies.decode_token_payload(token))
+    if token_in:
+        refresh_data = dependencies.decode_token_payload(
+            token_in.refresh_token, token_type=security.REFRESH_TOKEN_TYPE
+        )
+        if refresh_data.sub != current_user.id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        await service.TokenService.revoke(db, refresh_data)
+    return {"status": "success"}
+
 @router.post("/users", response_model=schemas.User)
 async def create_user(
     *,
@@ -49,6 +91,35 @@ async def create_user(
 
 @router.get("/me", response_model=schemas.User)
 async def read_user_me(
-    current_user: models.User = Depends(dependencies.get_current_user),
+    current_user: schemas.User = Depends(dependencies.get_current_user),
 ) -> Any:
     return current_user
+
+@router.put("/me", response_model=schemas.User)
+async def update_user_me(
+    *,
+    db: AsyncSession = Depends(get_db),
+    user_in: schemas.UserUpdate,
+    current_user: schemas.User = Depends(dependencies.get_current_user),
+) -> Any:
+    if user_in.email and user_in.email != current_user.email:
+        existing = await service.UserService.get_by_email(db, email=user_in.email)
+        if existing:
+            raise HTTPException(
+                status_code=400,
+                detail="The user with this username already exists in the system.",
+            )
+    return await service.UserService.update(db, id=current_user.id, obj_in=user_in)
+
+@router.delete("/me", status_code=status.HTTP_202_ACCEPTED)
+async def delete_user_me(
+    *,
+    db: AsyncSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    token: str = Depends(dependencies.reusable_oauth2),
+    current_user: schemas.User = Depends(dependencies.get_current_user),
+) -> Any:
+    await service.UserService.request_deletion(db, user_id=current_user.id)
+    await service.TokenService.revoke(db, dependencies.decode_token_payload(token))
+    background_tasks.add_task(service.purge_account, db.bind, current_user.id)
+    return {"status": "accepted"}
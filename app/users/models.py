@@ -3,7 +3,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class User(Base):
     __tablename__ = "user"
@@ -13,9 +13,18 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String, nullable=False)
     full_name: Mapped[str] = mapped_column(String, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    deletion_requested_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
 
 
-    documents: Mapped[List["Document"]] = relationship("Document", back_populates="owner", cascade="all, delete-orphan")
-    shares_received: Mapped[List["DocumentShare"]] = relationship("DocumentShare", back_populates="user", cascade="all, delete-orphan")
+    documents: Mapped[List["Document"]] = relationship("Document", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    shares_received: Mapped[List["DocumentShare"]] = relationship("DocumentShare", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_token"
+
+    jti: Mapped[str] = mapped_column(String, primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), index=True)
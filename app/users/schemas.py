@@ -26,6 +26,13 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+    type: Optional[str] = None
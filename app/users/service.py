@@ -1,9 +1,20 @@
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core import security
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from app.core import invalidation, security
+from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.documents import search_cache
+from app.documents.models import Document
+from app.documents.service import DocumentService
+from app.groups.models import Group, GroupMembership
 from app.users import models, schemas
 
+logger = logging.getLogger(__name__)
+
 class UserService:
     @staticmethod
     async def get_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
@@ -15,23 +26,153 @@ class UserService:
         result = await db.execute(select(models.User).filter(models.User.id == user_id))
         return result.scalars().first()
 
+    @staticmethod
+    async def get_existing_ids(db: AsyncSession, ids: List[int]) -> Set[int]:
+        result = await db.execute(select(models.User.id).filter(models.User.id.in_(ids)))
+        return set(result.scalars().all())
+
     @staticmethod
     async def create(db: AsyncSession, user_in: schemas.UserCreate) -> models.User:
-        db_obj = models.User(
-            email=user_in.email,
-            hashed_password=security.get_password_hash(user_in.password),
-            full_name=user_in.full_name,
+        db_obj = await db.scalar(
+            insert(models.User)
+            .values(
+                email=user_in.email,
+                hashed_password=await security.get_password_hash_async(user_in.password),
+                full_name=user_in.full_name,
+            )
+            .returning(models.User)
+        )
+        await db.commit()
+        return db_obj
+
+    @staticmethod
+    async def update(db: AsyncSession, id: int, obj_in: schemas.UserUpdate) -> Optional[models.User]:
+        update_data = obj_in.model_dump(exclude_unset=True)
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = await security.get_password_hash_async(password)
+        db_obj = await db.scalar(
+            update(models.User).where(models.User.id == id).values(**update_data).returning(models.User)
+        )
+        await invalidation.publish(db, "user", id=id)
+        await db.commit()
+        return db_obj
+
+    @staticmethod
+    async def set_active(db: AsyncSession, db_obj: models.User, is_active: bool) -> models.User:
+        db_obj = await db.scalar(
+            update(models.User).where(models.User.id == db_obj.id).values(is_active=is_active).returning(models.User)
+        )
+        await invalidation.publish(db, "user", id=db_obj.id)
+        await db.commit()
+        return db_obj
+
+    @staticmethod
+    async def request_deletion(db: AsyncSession, user_id: int) -> Optional[models.User]:
+        db_obj = await db.scalar(
+            update(models.User)
+            .where(models.User.id == user_id)
+            .values(is_active=False, deletion_requested_at=func.now())
+            .returning(models.User)
         )
-        db.add(db_obj)
+        await invalidation.publish(db, "user", id=user_id)
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
+    @staticmethod
+    async def pending_deletions(db: AsyncSession, min_age_seconds: int = 0) -> List[int]:
+        result = await db.execute(
+            select(models.User.id)
+            .filter(models.User.deletion_requested_at <= func.now() - timedelta(seconds=min_age_seconds))
+            .order_by(models.User.deletion_requested_at)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def purge(db: AsyncSession, user_id: int, batch_size: Optional[int] = None) -> None:
+        batch_size = batch_size or settings.ACCOUNT_PURGE_BATCH_SIZE
+        while True:
+            result = await db.execute(
+                delete(Document)
+                .where(Document.id.in_(
+                    select(Document.id)
+                    .filter(Document.owner_id == user_id)
+                    .order_by(Document.id)
+                    .limit(batch_size)
+                ))
+                .returning(Document.id, DocumentService.audience())
+            )
+            rows = result.all()
+            if not rows:
+                break
+            await invalidation.publish_many(db, "document", [{"id": id} for id, _ in rows])
+            await search_cache.publish(db, [member_id for _, audience in rows for member_id in audience or ()])
+            await db.commit()
+
+        result = await db.execute(
+            select(GroupMembership.user_id)
+            .join(Group, Group.id == GroupMembership.group_id)
+            .filter(Group.owner_id == user_id)
+            .distinct()
+        )
+        member_ids = set(result.scalars().all()) | {user_id}
+        await db.execute(delete(models.User).where(models.User.id == user_id))
+        await invalidation.publish_many(db, "membership", [{"user_id": id} for id in sorted(member_ids)])
+        await search_cache.publish(db, member_ids)
+        await invalidation.publish(db, "user", id=user_id)
+        await db.commit()
+
     @staticmethod
     async def authenticate(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
         user = await UserService.get_by_email(db, email)
         if not user:
             return None
-        if not security.verify_password(password, user.hashed_password):
+        if not await security.verify_password_async(password, user.hashed_password):
             return None
+        if security.password_needs_rehash(user.hashed_password):
+            user.hashed_password = await security.get_password_hash_async(password)
+            db.add(user)
+            await db.commit()
         return user
+
+
+async def purge_account(bind: AsyncEngine, user_id: int) -> None:
+    try:
+        async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+            await UserService.purge(db, user_id)
+    except Exception:
+        logger.exception("Account purge failed for user %s", user_id)
+
+
+async def resume_purges(bind: AsyncEngine, min_age_seconds: int) -> int:
+    """Re-run purges for accounts whose deletion was requested but never completed."""
+    async with AsyncSession(bind=bind) as db:
+        user_ids = await UserService.pending_deletions(db, min_age_seconds)
+    for user_id in user_ids:
+        await purge_account(bind, user_id)
+    return len(user_ids)
+
+
+class TokenService:
+    @staticmethod
+    async def revoke(db: AsyncSession, payload: schemas.TokenPayload) -> bool:
+        """Revoke a token; False if it was already revoked (or cannot be), so single use can be enforced."""
+        if not payload.jti or not payload.exp:
+            return False
+        expires_at = datetime.utcfromtimestamp(payload.exp)
+        inserted = await db.scalar(
+            insert(models.RevokedToken)
+            .values(jti=payload.jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[models.RevokedToken.jti])
+            .returning(models.RevokedToken.jti)
+        )
+        await db.commit()
+        revocation_list.add(payload.jti, expires_at)
+        return inserted is not None
+
+    @staticmethod
+    async def purge_expired(db: AsyncSession) -> None:
+        await db.execute(
+            delete(models.RevokedToken).where(models.RevokedToken.expires_at <= datetime.utcnow())
+        )
+        await db.commit()
@@ -0,0 +1,82 @@
+"""Latency of a cheap endpoint while login traffic runs on the same worker.
+
+Runs the app in-process against the configured database and compares bcrypt
+running inline on the event loop with bcrypt on the password hasher pool:
+
+    python -m benchmarks.login_latency --logins 8 --probes 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.main import app
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "benchmark-password"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login_loop(client: AsyncClient, stop: asyncio.Event) -> int:
+    count = 0
+    while not stop.is_set():
+        await client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={"username": EMAIL, "password": PASSWORD},
+        )
+        count += 1
+    return count
+
+
+async def run(workers: int, logins: int, probes: int) -> None:
+    password_hasher.shutdown()
+    password_hasher.workers = workers
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        await client.post(
+            f"{settings.API_V1_STR}/users",
+            json={"email": EMAIL, "password": PASSWORD, "full_name": "Bench"},
+        )
+        stop = asyncio.Event()
+        login_tasks = [asyncio.create_task(login_loop(client, stop)) for _ in range(logins)]
+        await asyncio.sleep(0.5)
+
+        latencies = []
+        for _ in range(probes):
+            start = time.perf_counter()
+            await client.get("/")
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.005)
+
+        stop.set()
+        total_logins = sum(await asyncio.gather(*login_tasks))
+
+    mode = "inline" if workers <= 0 else f"{password_hasher.kind} pool x{workers}"
+    print(
+        f"{mode:>20}: p50={statistics.median(latencies):8.2f}ms "
+        f"p99={percentile(latencies, 99):8.2f}ms logins={total_logins}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS or 4)
+    args = parser.parse_args()
+
+    await run(0, args.logins, args.probes)
+    await run(args.workers, args.logins, args.probes)
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Per-item CPU time and memory of a search page: ORM + response_model vs Core rows + TypeAdapter.
+
+Seeds one user with enough documents in the configured database, then builds
+the same page both ways and serializes it to JSON bytes:
+
+    python -m benchmarks.search_serialization --pages 100 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, insert, select
+
+from app.db import base  # noqa: F401
+from app.db.session import AsyncSessionLocal
+from app.documents import schemas
+from app.documents.models import Document
+from app.documents.service import DocumentService
+from app.shares.access import AccessIndexService
+from app.users.models import User
+
+EMAIL = "bench-search@example.com"
+
+
+async def seed(size: int) -> int:
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).filter(User.email == EMAIL))
+        if user is None:
+            user = User(email=EMAIL, hashed_password="x", full_name="Bench")
+            db.add(user)
+            await db.flush()
+        have = await db.scalar(select(func.count()).select_from(Document).filter(Document.owner_id == user.id))
+        if have < size:
+            ids = (await db.scalars(
+                insert(Document).returning(Document.id),
+                [
+                    {
+                        "title": f"Benchmark document {i}",
+                        "description": "Seeded to measure search page serialization " * 3,
+                        "tags": ["bench", f"t{i % 20}"],
+                        "s3_url": f"s3://bench/{i}",
+                        "owner_id": user.id,
+                    }
+                    for i in range(have, size)
+                ],
+            )).all()
+            await AccessIndexService.grant_owners(db, document_ids=list(ids))
+        await db.commit()
+        return user.id
+
+
+async def orm_page(db, user_id: int, limit: int) -> bytes:
+    result = await db.execute(
+        select(Document).filter(Document.owner_id == user_id).order_by(Document.created_at.desc()).limit(limit)
+    )
+    items = [schemas.DocumentSearchHit.model_validate(doc) for doc in result.scalars().all()]
+    response = schemas.DocumentSearchResults.model_validate({"items": items, "total": len(items)})
+    return json.dumps(jsonable_encoder(response)).encode()
+
+
+async def fast_page(db, user_id: int, limit: int) -> bytes:
+    query, created_col, _ = await DocumentService._visible_query(db, user_id)
+    result = await db.execute(query.order_by(created_col.desc()).limit(limit))
+    items = [{**row, "rank": None, "highlight": None} for row in result.mappings()]
+    return schemas.search_results_adapter.dump_json({
+        "items": items, "total": len(items), "total_is_estimate": False,
+        "has_more": False, "facets": None, "next_cursor": None,
+    })
+
+
+async def measure(build, user_id: int, limit: int, repeat: int):
+    async with AsyncSessionLocal() as db:
+        body = await build(db, user_id, limit)
+
+    cpu = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.process_time()
+            await build(db, user_id, limit)
+            cpu.append((time.process_time() - start) / limit * 1e6)
+
+    # Traced separately: tracemalloc itself would dominate the CPU numbers.
+    async with AsyncSessionLocal() as db:
+        tracemalloc.start()
+        await build(db, user_id, limit)
+        peak = tracemalloc.get_traced_memory()[1] / limit
+        tracemalloc.stop()
+    return statistics.median(cpu), peak, len(body)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = await seed(max(args.pages))
+    for limit in args.pages:
+        for name, build in (("orm+response_model", orm_page), ("core+TypeAdapter", fast_page)):
+            cpu, peak, size = await measure(build, user_id, limit, args.repeat)
+            print(f"{limit:>5} items {name:>20}: cpu={cpu:8.1f}us/item peak={peak / 1024:7.2f}KiB/item body={size}B")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
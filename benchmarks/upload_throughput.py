@@ -0,0 +1,111 @@
+"""Sustained upload throughput into the object store, with and without the HTTP layer.
+
+Streams a generated multi-GB body through PUT /documents/{id}/content in-process
+and, separately, straight into ContentService.store, writing to a temporary
+local store. Peak RSS shows the body is never held in memory:
+
+    python -m benchmarks.upload_throughput --size-gb 2 --repeat 2
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.main import app
+from app.storage import service as storage
+from app.storage.local import LocalObjectStore
+
+EMAIL = "bench-upload@example.com"
+PASSWORD = "benchmark-password"
+BOUNDARY = "benchmark-boundary"
+BLOCK = 1024 * 1024
+
+
+async def generate(size: int):
+    # A random prefix keeps each run from deduplicating against the previous one.
+    yield os.urandom(BLOCK)
+    block = os.urandom(BLOCK)
+    for _ in range(size // BLOCK - 1):
+        yield block
+
+
+async def multipart_body(size: int):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="bench.bin"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    async for chunk in generate(size):
+        yield chunk
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def peak_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def report(name: str, size: int, elapsed: float) -> None:
+    print(
+        f"{name:>12}: {size / 2**30:.2f}GiB in {elapsed:6.2f}s "
+        f"= {size / 2**20 / elapsed:8.1f}MiB/s peak_rss={peak_rss_mib():.0f}MiB"
+    )
+
+
+async def run_http(client: AsyncClient, headers: dict, document_id: int, size: int) -> None:
+    start = time.perf_counter()
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{document_id}/content",
+        content=multipart_body(size),
+        headers={**headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    response.raise_for_status()
+    report("http", size, time.perf_counter() - start)
+
+
+async def run_store(size: int) -> None:
+    start = time.perf_counter()
+    await storage.ContentService.store(generate(size), max_bytes=size)
+    report("store only", size, time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-gb", type=float, default=2)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--chunk-mb", type=float, default=settings.UPLOAD_CHUNK_SIZE / 2**20)
+    args = parser.parse_args()
+    size = int(args.size_gb * 2**30) // BLOCK * BLOCK
+
+    settings.UPLOAD_MAX_BYTES = size
+    settings.UPLOAD_CHUNK_SIZE = int(args.chunk_mb * 2**20)
+    with tempfile.TemporaryDirectory() as root:
+        storage.object_store = LocalObjectStore(
+            root=root, bucket=settings.STORAGE_BUCKET, chunk_size=settings.UPLOAD_CHUNK_SIZE
+        )
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            await client.post(
+                f"{settings.API_V1_STR}/users",
+                json={"email": EMAIL, "password": PASSWORD, "full_name": "Bench"},
+            )
+            login = await client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data={"username": EMAIL, "password": PASSWORD},
+            )
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            document = await client.post(
+                f"{settings.API_V1_STR}/documents/",
+                json={"title": "Upload benchmark", "s3_url": "pending"},
+                headers=headers,
+            )
+            for _ in range(args.repeat):
+                await run_store(size)
+                await run_http(client, headers, document.json()["id"], size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
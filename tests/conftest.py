@@ -1,7 +1,7 @@
 import asyncio
 import pytest
 from typing import AsyncGenerator
-from httpx import AsyncClient
+from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from app.main import app
 from app.db.session import Base, get_db
@@ -17,11 +17,6 @@ TestingSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
-@pytest.fixture(scope="session")
-def event_loop():
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
 
 @pytest.fixture(scope="session", autouse=True)
 async def setup_db():
@@ -43,6 +38,18 @@ async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield db
     
     app.dependency_overrides[get_db] = _get_test_db
-    async with AsyncClient(app=app, base_url="http://test") as ac:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
     app.dependency_overrides.clear()
+
+@pytest.fixture
+def assert_max_statements(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_STATEMENT_HEADER", True)
+
+    def check(response, budget: int) -> int:
+        count = int(response.headers["x-db-statements"])
+        assert count <= budget, (
+            f"{response.request.method} {response.request.url.path} ran {count} SQL statements, budget is {budget}"
+        )
+        return count
+    return check
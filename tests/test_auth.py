@@ -1,6 +1,9 @@
 import pytest
 from httpx import AsyncClient
+from app.core.cache import principal_cache
 from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.users.service import UserService
 
 @pytest.mark.asyncio
 async def test_create_user(client: AsyncClient):
@@ -50,3 +53,133 @@ async def test_read_user_me(client: AsyncClient):
     )
     assert response.status_code == 200
     assert response.json()["email"] == "me@example.com"
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached(client: AsyncClient):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "cached@example.com", "password": "password", "full_name": "Cached User"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "cached@example.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+    await client.get(f"{settings.API_V1_STR}/me", headers=headers)
+    hits = principal_cache.hits
+    response = await client.get(f"{settings.API_V1_STR}/me", headers=headers)
+    assert response.status_code == 200
+    assert principal_cache.hits == hits + 1
+
+@pytest.mark.asyncio
+async def test_deactivated_user_is_evicted_from_cache(client: AsyncClient, db):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "inactive@example.com", "password": "password", "full_name": "Inactive User"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "inactive@example.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    assert (await client.get(f"{settings.API_V1_STR}/me", headers=headers)).status_code == 200
+
+    user = await UserService.get_by_email(db, email="inactive@example.com")
+    await UserService.set_active(db, db_obj=user, is_active=False)
+
+    response = await client.get(f"{settings.API_V1_STR}/me", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_login_rehashes_when_cost_changes(client: AsyncClient, db, monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "rehash@example.com", "password": "password", "full_name": "Rehash User"},
+    )
+    user = await UserService.get_by_email(db, email="rehash@example.com")
+    assert user.hashed_password.startswith("$2b$04$")
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    response = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "rehash@example.com", "password": "password"},
+    )
+    assert response.status_code == 200
+    await db.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotation(client: AsyncClient):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "refresh@example.com", "password": "password", "full_name": "Refresh User"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "refresh@example.com", "password": "password"},
+    )
+    refresh_token = login_res.json()["refresh_token"]
+
+    response = await client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": refresh_token},
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me_res = await client.get(
+        f"{settings.API_V1_STR}/me",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert me_res.json()["email"] == "refresh@example.com"
+
+    reuse_res = await client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": refresh_token},
+    )
+    assert reuse_res.status_code == 403
+
+    wrong_type_res = await client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": token},
+    )
+    assert wrong_type_res.status_code == 403
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_token(client: AsyncClient):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "logout@example.com", "password": "password", "full_name": "Logout User"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "logout@example.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    assert (await client.get(f"{settings.API_V1_STR}/me", headers=headers)).status_code == 200
+
+    response = await client.post(f"{settings.API_V1_STR}/logout", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get(f"{settings.API_V1_STR}/me", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_refresh_token_single_use_across_workers(client: AsyncClient, monkeypatch):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "refresh-race@example.com", "password": "password", "full_name": "Refresh Race"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "refresh-race@example.com", "password": "password"},
+    )
+    refresh_token = login_res.json()["refresh_token"]
+    # Another worker whose in-memory revocation list has not caught up yet.
+    monkeypatch.setattr(revocation_list, "is_revoked", lambda jti: False)
+
+    first = await client.post(f"{settings.API_V1_STR}/login/refresh-token", json={"refresh_token": refresh_token})
+    second = await client.post(f"{settings.API_V1_STR}/login/refresh-token", json={"refresh_token": refresh_token})
+    assert first.status_code == 200
+    assert second.status_code == 403
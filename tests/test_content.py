@@ -0,0 +1,270 @@
+import hashlib
+import io
+import os
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+from app.core.config import settings
+from app.documents.previews import preview_pool
+from app.storage import service as storage
+from app.storage.local import LocalObjectStore
+
+@pytest.fixture
+def object_store(tmp_path, monkeypatch):
+    store = LocalObjectStore(root=str(tmp_path), bucket="documents", chunk_size=1024)
+    monkeypatch.setattr(storage, "object_store", store)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1024)
+    return store
+
+async def get_headers(client: AsyncClient, email: str):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": email, "password": "password", "full_name": f"User {email}"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": "password"},
+    )
+    return {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+async def create_document(client: AsyncClient, headers: dict, title: str) -> int:
+    response = await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": title, "s3_url": "pending"}, headers=headers
+    )
+    return response.json()["id"]
+
+async def chunked(head: bytes, chunk: bytes, repeat: int):
+    yield head
+    for _ in range(repeat):
+        yield chunk
+
+def stored_files(store: LocalObjectStore):
+    return sorted(
+        os.path.join(path, name)
+        for path, _, names in os.walk(store.root)
+        for name in names
+    )
+
+@pytest.mark.asyncio
+async def test_upload_content_is_deduplicated(client: AsyncClient, object_store):
+    headers = await get_headers(client, "uploader@example.com")
+    payload = os.urandom(10_000)
+    digest = hashlib.sha256(payload).hexdigest()
+
+    first = await create_document(client, headers, "Upload one")
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{first}/content",
+        files={"file": ("report.bin", payload, "application/octet-stream")},
+        data={"note": "ignored"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["content_digest"] == digest
+    assert data["content_size"] == len(payload)
+    assert data["content_type"] == "application/octet-stream"
+    assert data["content_filename"] == "report.bin"
+    assert data["s3_url"] == f"local://documents/sha256/{digest[:2]}/{digest[2:4]}/{digest}"
+    assert response.headers["etag"]
+
+    second = await create_document(client, headers, "Upload two")
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{second}/content",
+        files={"file": ("copy.bin", payload, "application/octet-stream")},
+        headers=headers,
+    )
+    assert response.json()["content_digest"] == digest
+
+    files = stored_files(object_store)
+    assert files == [object_store.path(storage.content_key(digest))]
+    with open(files[0], "rb") as stored:
+        assert stored.read() == payload
+
+@pytest.mark.asyncio
+async def test_upload_limits_and_errors(client: AsyncClient, object_store, monkeypatch):
+    owner = await get_headers(client, "upload-owner@example.com")
+    other = await get_headers(client, "upload-other@example.com")
+    id = await create_document(client, owner, "Limited upload")
+    url = f"{settings.API_V1_STR}/documents/{id}/content"
+
+    response = await client.put(url, files={"file": ("a.txt", b"hello")}, headers=other)
+    assert response.status_code == 403
+
+    response = await client.put(url, files={"other": ("a.txt", b"hello")}, headers=owner)
+    assert response.status_code == 400
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 4096)
+    response = await client.put(url, files={"file": ("big.bin", b"x" * 5000)}, headers=owner)
+    assert response.status_code == 413
+
+    response = await client.put(
+        url,
+        content=b"x" * (4096 + 70 * 1024),
+        headers={**owner, "Content-Type": "multipart/form-data; boundary=unused"},
+    )
+    assert response.status_code == 413
+
+    multipart = {**owner, "Content-Type": "multipart/form-data; boundary=b"}
+    response = await client.put(
+        url, content=chunked(b"--b\r\nX-Long: ", b"a" * 1024, repeat=64), headers=multipart
+    )
+    assert response.status_code == 400
+    assert "header" in response.json()["detail"].lower()
+
+    response = await client.put(
+        url, content=chunked(b"--b\r\n", b"X-Header: 1\r\n", repeat=32), headers=multipart
+    )
+    assert response.status_code == 400
+    assert "header" in response.json()["detail"].lower()
+
+    response = await client.put(
+        url,
+        content=chunked(b'--b\r\nContent-Disposition: form-data; name="note"\r\n\r\n', b"n" * 1024, repeat=80),
+        headers=multipart,
+    )
+    assert response.status_code == 413
+
+    assert stored_files(object_store) == []
+    response = await client.get(f"{settings.API_V1_STR}/documents/{id}", headers=owner)
+    assert response.json()["content_digest"] is None
+
+@pytest.mark.asyncio
+async def test_download_content_ranges_and_conditionals(client: AsyncClient, object_store):
+    owner = await get_headers(client, "download-owner@example.com")
+    other = await get_headers(client, "download-other@example.com")
+    payload = bytes(range(256)) * 40
+    id = await create_document(client, owner, "Downloadable")
+    url = f"{settings.API_V1_STR}/documents/{id}/content"
+
+    response = await client.get(url, headers=owner)
+    assert response.status_code == 404
+
+    await client.put(url, files={"file": ("data.bin", payload, "application/x-test")}, headers=owner)
+
+    response = await client.get(url, headers=owner)
+    assert response.status_code == 200
+    assert response.content == payload
+    assert response.headers["content-type"] == "application/x-test"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-disposition"] == 'attachment; filename="data.bin"'
+    etag = response.headers["etag"]
+    assert etag == f'"{hashlib.sha256(payload).hexdigest()}"'
+
+    response = await client.head(url, headers=owner)
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(payload))
+
+    response = await client.get(url, headers={**owner, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = await client.get(url, headers={**owner, "Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(payload)}"
+    assert response.content == payload[100:200]
+
+    response = await client.get(url, headers={**owner, "Range": "bytes=0-9,-10"})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges")
+    assert payload[:10] in response.content and payload[-10:] in response.content
+
+    response = await client.get(url, headers={**owner, "Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == payload
+
+    response = await client.get(url, headers={**owner, "Range": f"bytes={len(payload)}-"})
+    assert response.status_code == 416
+
+    response = await client.get(url, headers=other)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_preview_generated_from_upload(client: AsyncClient, object_store):
+    owner = await get_headers(client, "preview-owner@example.com")
+    other = await get_headers(client, "preview-other@example.com")
+    image = io.BytesIO()
+    Image.new("RGB", (1200, 600), "navy").save(image, "PNG")
+
+    id = await create_document(client, owner, "Picture")
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{id}/content",
+        files={"file": ("picture.png", image.getvalue(), "image/png")},
+        headers=owner,
+    )
+    digest = response.json()["content_digest"]
+    url = f"{settings.API_V1_STR}/documents/{id}/preview/{digest}"
+
+    response = await client.get(url, headers=owner)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "immutable" in response.headers["cache-control"]
+    with Image.open(io.BytesIO(response.content)) as preview:
+        assert preview.size == (settings.PREVIEW_SIZE, settings.PREVIEW_SIZE // 2)
+
+    response = await client.get(url, headers={**owner, "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+    response = await client.get(url, headers=other)
+    assert response.status_code == 403
+
+    response = await client.get(f"{settings.API_V1_STR}/documents/{id}/preview/{'0' * 64}", headers=owner)
+    assert response.status_code == 404
+
+    text_id = await create_document(client, owner, "Notes")
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{text_id}/content",
+        files={"file": ("notes.txt", b"first line\nsecond line\n", "text/plain")},
+        headers=owner,
+    )
+    digest = response.json()["content_digest"]
+    response = await client.get(f"{settings.API_V1_STR}/documents/{text_id}/preview/{digest}", headers=owner)
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_skipped_preview_is_generated_on_demand(client: AsyncClient, object_store, monkeypatch):
+    owner = await get_headers(client, "preview-retry@example.com")
+    monkeypatch.setattr(preview_pool, "max_pending", 0)
+    id = await create_document(client, owner, "Queued picture")
+    image = io.BytesIO()
+    Image.new("RGB", (64, 64), "teal").save(image, "PNG")
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{id}/content",
+        files={"file": ("queued.png", image.getvalue(), "image/png")},
+        headers=owner,
+    )
+    url = f"{settings.API_V1_STR}/documents/{id}/preview/{response.json()['content_digest']}"
+
+    response = await client.get(url, headers=owner)
+    assert response.status_code == 404
+    assert response.headers["retry-after"]
+    assert response.headers["cache-control"] == "no-store"
+
+    monkeypatch.setattr(preview_pool, "max_pending", settings.PREVIEW_MAX_PENDING)
+    response = await client.get(url, headers=owner)
+    assert response.status_code == 404
+    response = await client.get(url, headers=owner)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+
+@pytest.mark.asyncio
+async def test_failed_preview_is_not_resubmitted(client: AsyncClient, object_store, monkeypatch):
+    owner = await get_headers(client, "preview-broken@example.com")
+    id = await create_document(client, owner, "Broken picture")
+    response = await client.put(
+        f"{settings.API_V1_STR}/documents/{id}/content",
+        files={"file": ("broken.png", b"not a png", "image/png")},
+        headers=owner,
+    )
+    digest = response.json()["content_digest"]
+    assert preview_pool.has_failed(digest)
+
+    submitted = []
+
+    async def generate(digest, content_type):
+        submitted.append(digest)
+
+    monkeypatch.setattr(preview_pool, "generate", generate)
+    response = await client.get(f"{settings.API_V1_STR}/documents/{id}/preview/{digest}", headers=owner)
+    assert response.status_code == 404
+    assert "retry-after" not in response.headers
+    assert submitted == []
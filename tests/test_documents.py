@@ -1,6 +1,11 @@
+import csv
+import io
+import json
 import pytest
 from httpx import AsyncClient
 from app.core.config import settings
+from app.documents import service
+from app.documents.search_cache import search_cache
 
 @pytest.fixture
 async def auth_header(client: AsyncClient):
@@ -85,6 +90,16 @@ async def test_search_documents(client: AsyncClient, auth_header: dict):
     assert data["total"] >= 1
     assert data["items"][0]["title"] == "Searchable Doc"
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params", [
+    {"limit": 0},
+    {"limit": settings.SEARCH_MAX_LIMIT + 1},
+    {"skip": -1},
+])
+async def test_search_rejects_out_of_range_paging(client: AsyncClient, auth_header: dict, params):
+    response = await client.get(f"{settings.API_V1_STR}/documents/search/", params=params, headers=auth_header)
+    assert response.status_code == 422
+
 @pytest.mark.asyncio
 async def test_delete_document(client: AsyncClient, auth_header: dict):
     create_res = await client.post(
@@ -106,3 +121,225 @@ async def test_delete_document(client: AsyncClient, auth_header: dict):
         headers=auth_header
     )
     assert get_res.status_code == 404
+
+@pytest.mark.asyncio
+async def test_full_text_search_ranking(client: AsyncClient, auth_header: dict):
+    await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Quarterly budget", "description": "Finance planning notes", "s3_url": "url"},
+        headers=auth_header
+    )
+    await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Team offsite", "description": "Agenda includes the budget review", "s3_url": "url"},
+        headers=auth_header
+    )
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/search/?q=budgets",
+        headers=auth_header
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["title"] for item in items[:2]] == ["Quarterly budget", "Team offsite"]
+    assert items[0]["rank"] >= items[1]["rank"]
+    assert "<b>budget</b>" in items[0]["highlight"]
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/search/?q=udget&mode=ilike",
+        headers=auth_header
+    )
+    assert response.json()["total"] >= 2
+    assert response.json()["items"][0]["highlight"] is None
+
+@pytest.mark.asyncio
+async def test_search_tags_and_facets(client: AsyncClient, auth_header: dict):
+    for title, tags in [
+        ("Facet A", ["facet-x", "facet-y"]),
+        ("Facet B", ["facet-x"]),
+        ("Facet C", None),
+    ]:
+        await client.post(
+            f"{settings.API_V1_STR}/documents/",
+            json={"title": title, "s3_url": "url", "tags": tags},
+            headers=auth_header
+        )
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/search/?tag=facet-x&tag=facet-y",
+        headers=auth_header
+    )
+    assert [item["title"] for item in response.json()["items"]] == ["Facet A"]
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/search/?q=Facet&mode=ilike&facets=tags",
+        headers=auth_header
+    )
+    data = response.json()
+    assert data["total"] == 3
+    assert data["facets"] == {"tags": {"facet-x": 2, "facet-y": 1}}
+
+@pytest.mark.asyncio
+async def test_search_cursor_pagination(client: AsyncClient, auth_header: dict):
+    for i in range(5):
+        await client.post(
+            f"{settings.API_V1_STR}/documents/",
+            json={"title": f"Paged report {i}", "s3_url": "url"},
+            headers=auth_header
+        )
+
+    for params in ["q=Paged&mode=ilike", "q=paged"]:
+        seen = []
+        cursor = None
+        while True:
+            url = f"{settings.API_V1_STR}/documents/search/?{params}&limit=2"
+            if cursor:
+                url += f"&cursor={cursor}"
+            data = (await client.get(url, headers=auth_header)).json()
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/search/?cursor=not-a-cursor",
+        headers=auth_header
+    )
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_search_count_modes(client: AsyncClient, auth_header: dict, monkeypatch):
+    for i in range(4):
+        await client.post(
+            f"{settings.API_V1_STR}/documents/",
+            json={"title": f"Counted memo {i}", "s3_url": "url"},
+            headers=auth_header
+        )
+    url = f"{settings.API_V1_STR}/documents/search/?q=Counted&mode=ilike&limit=2"
+
+    data = (await client.get(f"{url}&count=none", headers=auth_header)).json()
+    assert data["total"] is None
+    assert data["has_more"] is True
+    assert len(data["items"]) == 2
+
+    data = (await client.get(f"{url}&count=estimate", headers=auth_header)).json()
+    assert data["total"] == 4
+    assert data["total_is_estimate"] is False
+
+    monkeypatch.setattr(service, "COUNT_ESTIMATE_CAP", 2)
+    search_cache.clear()
+    data = (await client.get(f"{url}&count=estimate", headers=auth_header)).json()
+    assert data["total"] >= 2
+    assert data["total_is_estimate"] is True
+
+@pytest.mark.asyncio
+async def test_batch_create_and_bulk_fetch(client: AsyncClient, auth_header: dict):
+    response = await client.post(
+        f"{settings.API_V1_STR}/documents/batch",
+        json={"items": [{"title": f"Batch doc {i}", "s3_url": "url", "tags": ["batch"]} for i in range(3)]},
+        headers=auth_header
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["status_code"] == 201 for r in results)
+    assert [r["document"]["title"] for r in results] == ["Batch doc 0", "Batch doc 1", "Batch doc 2"]
+
+    ids = [r["document"]["id"] for r in results]
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/?" + "&".join(f"ids={i}" for i in ids + [999999]),
+        headers=auth_header
+    )
+    assert response.status_code == 200
+    assert [doc["id"] for doc in response.json()] == sorted(ids)
+
+    response = await client.get(f"{settings.API_V1_STR}/documents/{ids[0]}", headers=auth_header)
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_document_conditional_requests(client: AsyncClient, auth_header: dict):
+    doc = (await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Conditional", "s3_url": "url"},
+        headers=auth_header
+    )).json()
+    url = f"{settings.API_V1_STR}/documents/{doc['id']}"
+
+    response = await client.get(url, headers=auth_header)
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+
+    service.document_cache.clear()
+    response = await client.get(url, headers={**auth_header, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    response = await client.get(url, headers={**auth_header, "If-None-Match": f'W/{etag}, "other"'})
+    assert response.status_code == 304
+    response = await client.get(url, headers={**auth_header, "If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+    response = await client.put(url, json={"title": "Conditional v2"}, headers={**auth_header, "If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+
+    response = await client.put(url, json={"title": "Lost update"}, headers={**auth_header, "If-Match": etag})
+    assert response.status_code == 412
+    response = await client.delete(url, headers={**auth_header, "If-Match": etag})
+    assert response.status_code == 412
+    response = await client.get(url, headers={**auth_header, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Conditional v2"
+
+    response = await client.put(url, json={"title": "Weak match"}, headers={**auth_header, "If-Match": f"W/{new_etag}"})
+    assert response.status_code == 412
+
+    response = await client.delete(url, headers={**auth_header, "If-Match": new_etag})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_export_documents(client: AsyncClient, auth_header: dict, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    await client.post(
+        f"{settings.API_V1_STR}/documents/batch",
+        json={"items": [{"title": f"Export, doc {i}", "s3_url": "url", "tags": ["export", "x"]} for i in range(5)]},
+        headers=auth_header
+    )
+    await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Not exported", "s3_url": "url"},
+        headers=auth_header
+    )
+
+    response = await client.get(f"{settings.API_V1_STR}/documents/export/?tag=export", headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == [f"Export, doc {i}" for i in reversed(range(5))]
+    assert rows[0]["tags"] == ["export", "x"]
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/documents/export/?format=csv&tag=export", headers=auth_header
+    )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="documents.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert rows[0]["title"] == "Export, doc 4"
+    assert rows[0]["tags"] == "export;x"
+
+@pytest.mark.asyncio
+async def test_search_highlight_escapes_markup(client: AsyncClient, auth_header: dict):
+    await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "<script>alert(1)</script> rollout", "description": "a & b <i>plan</i>", "s3_url": "url"},
+        headers=auth_header
+    )
+    response = await client.get(f"{settings.API_V1_STR}/documents/search/?q=rollout", headers=auth_header)
+    highlight = response.json()["items"][0]["highlight"]
+    assert "<script>" not in highlight and "<i>" not in highlight
+    assert "alert(1)&lt;/script&gt;" in highlight
+    assert "<b>rollout</b>" in highlight
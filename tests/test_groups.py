@@ -0,0 +1,167 @@
+import pytest
+from httpx import AsyncClient
+from app.core.config import settings
+from sqlalchemy import text
+from app.shares.models import PermissionType
+from app.documents.service import DocumentService
+from app.users import service as user_service
+from app.users.service import UserService
+
+async def get_headers(client: AsyncClient, email: str):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": email, "password": "password", "full_name": f"User {email}"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": "password"},
+    )
+    return {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+@pytest.mark.asyncio
+async def test_group_share_follows_membership(client: AsyncClient):
+    owner = await get_headers(client, "group-owner@example.com")
+    member = await get_headers(client, "group-member@example.com")
+    member_id = (await client.get(f"{settings.API_V1_STR}/me", headers=member)).json()["id"]
+
+    doc_id = (await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Team handbook", "s3_url": "url", "tags": []},
+        headers=owner
+    )).json()["id"]
+    group_id = (await client.post(
+        f"{settings.API_V1_STR}/groups/", json={"name": "Team"}, headers=owner
+    )).json()["id"]
+
+    share_res = await client.post(
+        f"{settings.API_V1_STR}/shares/groups/",
+        json={"document_id": doc_id, "group_id": group_id, "permission": PermissionType.WRITE},
+        headers=owner
+    )
+    assert share_res.status_code == 200
+
+    assert (await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=member)).status_code == 403
+
+    add_res = await client.post(
+        f"{settings.API_V1_STR}/groups/{group_id}/members", json={"user_id": member_id}, headers=owner
+    )
+    assert add_res.status_code == 200
+
+    assert (await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=member)).status_code == 200
+    search_res = await client.get(f"{settings.API_V1_STR}/documents/search/?q=handbook", headers=member)
+    assert [item["id"] for item in search_res.json()["items"]] == [doc_id]
+    update_res = await client.put(
+        f"{settings.API_V1_STR}/documents/{doc_id}", json={"title": "Team handbook v2"}, headers=member
+    )
+    assert update_res.status_code == 200
+
+    await client.delete(f"{settings.API_V1_STR}/groups/{group_id}/members/{member_id}", headers=owner)
+    assert (await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=member)).status_code == 403
+    search_res = await client.get(f"{settings.API_V1_STR}/documents/search/?q=handbook", headers=member)
+    assert search_res.json()["items"] == []
+
+@pytest.mark.asyncio
+async def test_only_group_owner_manages_members(client: AsyncClient):
+    owner = await get_headers(client, "group-owner2@example.com")
+    other = await get_headers(client, "group-other2@example.com")
+    other_id = (await client.get(f"{settings.API_V1_STR}/me", headers=other)).json()["id"]
+    group_id = (await client.post(
+        f"{settings.API_V1_STR}/groups/", json={"name": "Private"}, headers=owner
+    )).json()["id"]
+
+    response = await client.post(
+        f"{settings.API_V1_STR}/groups/{group_id}/members", json={"user_id": other_id}, headers=other
+    )
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_add_unknown_group_member(client: AsyncClient):
+    owner = await get_headers(client, "group-owner3@example.com")
+    group_id = (await client.post(
+        f"{settings.API_V1_STR}/groups/", json={"name": "Ghosts"}, headers=owner
+    )).json()["id"]
+
+    response = await client.post(
+        f"{settings.API_V1_STR}/groups/{group_id}/members", json={"user_id": 999999}, headers=owner
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found"
+
+@pytest.mark.asyncio
+async def test_account_deletion_purges_owned_rows(client: AsyncClient, db, monkeypatch):
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_SIZE", 2)
+    leaving = await get_headers(client, "leaving@example.com")
+    staying = await get_headers(client, "staying@example.com")
+    leaving_id = (await client.get(f"{settings.API_V1_STR}/me", headers=leaving)).json()["id"]
+    staying_id = (await client.get(f"{settings.API_V1_STR}/me", headers=staying)).json()["id"]
+
+    doc_ids = [(await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": f"Leaving doc {i}", "s3_url": "url"},
+        headers=leaving
+    )).json()["id"] for i in range(5)]
+    await client.post(
+        f"{settings.API_V1_STR}/shares/",
+        json={"document_id": doc_ids[0], "user_id": staying_id},
+        headers=leaving
+    )
+    group_id = (await client.post(
+        f"{settings.API_V1_STR}/groups/", json={"name": "Leaving team"}, headers=leaving
+    )).json()["id"]
+    await client.post(
+        f"{settings.API_V1_STR}/groups/{group_id}/members", json={"user_id": staying_id}, headers=leaving
+    )
+    kept_doc = (await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Staying doc", "s3_url": "url"},
+        headers=staying
+    )).json()["id"]
+    await client.post(
+        f"{settings.API_V1_STR}/shares/",
+        json={"document_id": kept_doc, "user_id": leaving_id},
+        headers=staying
+    )
+    assert (await client.get(f"{settings.API_V1_STR}/documents/{doc_ids[0]}", headers=staying)).status_code == 200
+
+    response = await client.delete(f"{settings.API_V1_STR}/me", headers=leaving)
+    assert response.status_code == 202
+
+    assert (await client.get(f"{settings.API_V1_STR}/me", headers=leaving)).status_code in (400, 403)
+    assert (await client.get(f"{settings.API_V1_STR}/documents/{doc_ids[0]}", headers=staying)).status_code == 404
+    assert (await client.get(f"{settings.API_V1_STR}/documents/{kept_doc}", headers=staying)).status_code == 200
+
+    for table, column in [
+        ("document", "owner_id"),
+        ("document_share", "user_id"),
+        ("document_access", "user_id"),
+        ("group_membership", "user_id"),
+        ("user_group", "owner_id"),
+        ('"user"', "id"),
+    ]:
+        remaining = await db.scalar(text(f"SELECT count(*) FROM {table} WHERE {column} = :id"), {"id": leaving_id})
+        assert remaining == 0, table
+    assert await db.scalar(text("SELECT count(*) FROM document_access WHERE document_id = :id"), {"id": doc_ids[0]}) == 0
+
+@pytest.mark.asyncio
+async def test_interrupted_account_purge_is_resumed(client: AsyncClient, db, monkeypatch):
+    leaving = await get_headers(client, "interrupted@example.com")
+    leaving_id = (await client.get(f"{settings.API_V1_STR}/me", headers=leaving)).json()["id"]
+    doc_id = (await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Orphaned doc", "s3_url": "url"}, headers=leaving
+    )).json()["id"]
+
+    async def worker_died(bind, user_id):
+        pass
+
+    with monkeypatch.context() as patch:
+        patch.setattr(user_service, "purge_account", worker_died)
+        response = await client.delete(f"{settings.API_V1_STR}/me", headers=leaving)
+    assert response.status_code == 202
+    assert await DocumentService.get(db, doc_id) is not None
+    assert leaving_id in await UserService.pending_deletions(db)
+
+    assert await user_service.resume_purges(db.bind, min_age_seconds=0) >= 1
+    db.expire_all()
+    assert await DocumentService.get(db, doc_id) is None
+    assert await UserService.get_by_id(db, leaving_id) is None
+    assert leaving_id not in await UserService.pending_deletions(db)
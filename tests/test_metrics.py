@@ -0,0 +1,70 @@
+import os
+import re
+import pytest
+from httpx import AsyncClient
+from app.core import metrics
+from app.core.config import settings
+
+def sample(text: str, line_prefix: str) -> float:
+    match = re.search(rf"^{re.escape(line_prefix)} (\S+)$", text, re.MULTILINE)
+    assert match, line_prefix
+    return float(match.group(1))
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_statements_and_pool(client: AsyncClient):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "metrics@example.com", "password": "password"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "metrics@example.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    doc_id = (await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Measured", "s3_url": "url"}, headers=headers
+    )).json()["id"]
+    await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=headers)
+    await client.get(f"{settings.API_V1_STR}/documents/999999", headers=headers)
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = f"{settings.API_V1_STR}/documents/{{id}}"
+    assert sample(text, f'http_requests_total{{method="GET",route="{route}",status="200"}}') >= 1
+    assert sample(text, f'http_requests_total{{method="GET",route="{route}",status="404"}}') >= 1
+    assert sample(text, f'http_request_duration_seconds_count{{method="GET",route="{route}"}}') >= 2
+    assert sample(text, f'http_request_db_statements_sum{{method="POST",route="{settings.API_V1_STR}/documents/"}}') >= 2
+    assert sample(text, 'password_hash_seconds_count{operation="hash"}') >= 1
+    assert sample(text, "jwt_decode_seconds_count") >= 1
+    assert 'db_pool_checked_out{engine="primary"}' in text
+    assert '# TYPE http_request_duration_seconds histogram' in text
+
+def test_multiprocess_snapshots_are_merged(tmp_path, monkeypatch):
+    counter = {"type": "counter", "help": "c", "labelnames": ["route"], "samples": [[["/a"], 2.0]]}
+    histogram = {
+        "type": "histogram", "help": "h", "labelnames": [], "buckets": [0.1, 1.0],
+        "samples": [[[], [1, 0, 0, 0.05]]],
+    }
+    gauge = {"type": "gauge", "help": "g", "labelnames": ["engine"], "samples": [[["primary"], 3]]}
+    merged = metrics.merge([
+        (os.getpid(), {"c": counter, "h": histogram, "g": gauge}),
+        (os.getpid() + 10_000_000, {"c": counter, "h": histogram, "g": gauge}),
+    ])
+    assert merged["c"]["samples"] == [[["/a"], 4.0]]
+    assert merged["h"]["samples"] == [[[], [2, 0, 0, 0.1]]]
+    assert merged["g"]["samples"] == [[["primary", str(os.getpid())], 3]]
+
+    text = metrics.render(merged)
+    assert 'h_bucket{le="0.1"} 2' in text
+    assert 'h_bucket{le="+Inf"} 2' in text
+    assert "h_count 2" in text
+
+    monkeypatch.setattr(settings, "METRICS_MULTIPROCESS_DIR", str(tmp_path))
+    (tmp_path / "1.json").write_text('{"c": {"type": "counter", "help": "c", "labelnames": [], "samples": [[[], 5.0]]}}')
+    collected = metrics.collect()
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+    assert collected["c"]["samples"] == [[[], 5.0]]
+    assert "http_requests_total" in collected
@@ -0,0 +1,57 @@
+import json
+import logging
+import pytest
+from httpx import AsyncClient, ASGITransport
+from starlette.responses import PlainTextResponse, StreamingResponse
+from app.core.logs import JsonFormatter
+from app.core.middleware import LoggingMiddleware
+
+def make_app(status_code: int = 200, stream: bool = False):
+    async def app(scope, receive, send):
+        if stream:
+            async def chunks():
+                yield b"first,"
+                yield b"second"
+            response = StreamingResponse(chunks(), status_code=status_code)
+        else:
+            response = PlainTextResponse("ok", status_code=status_code)
+        await response(scope, receive, send)
+    return app
+
+@pytest.mark.asyncio
+async def test_request_headers_and_access_log(client: AsyncClient, caplog):
+    caplog.set_level(logging.INFO, logger="app.core.middleware")
+    response = await client.get("/")
+    assert response.status_code == 200
+    assert response.headers["x-request-id"]
+    assert float(response.headers["x-execution-time"]) >= 0
+
+    record = next(r for r in caplog.records if getattr(r, "request_id", None) == response.headers["x-request-id"])
+    assert record.status == 200
+    assert record.path == "/"
+
+@pytest.mark.asyncio
+async def test_streaming_response_passes_through(caplog):
+    caplog.set_level(logging.INFO, logger="app.core.middleware")
+    transport = ASGITransport(app=LoggingMiddleware(make_app(stream=True), sample_rate=0.0))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/export")
+    assert response.text == "first,second"
+    assert response.headers["x-request-id"]
+    assert not [r for r in caplog.records if r.name == "app.core.middleware"]
+
+    transport = ASGITransport(app=LoggingMiddleware(make_app(status_code=503), sample_rate=0.0))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.get("/failing")
+    assert [r.status for r in caplog.records if r.name == "app.core.middleware"] == [503]
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord({
+        "name": "app.core.middleware", "levelname": "INFO", "msg": "done in %s", "args": ("1s",),
+        "request_id": "abc", "status": 200,
+    })
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "done in 1s"
+    assert entry["request_id"] == "abc"
+    assert entry["status"] == 200
+    assert entry["level"] == "INFO"
@@ -0,0 +1,153 @@
+import json
+import pytest
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.documents import schemas
+from app.documents.models import Document
+from app.documents.service import DocumentService, document_cache
+from app.groups.models import Group, GroupMembership
+from app.groups.service import GroupService, membership_cache
+from app.shares.access import AccessIndexService
+from app.shares.models import DocumentGroupShare, DocumentShare, PermissionType
+from app.shares.permissions import PermissionResolver, group_permission_cache, permission_cache
+from app.shares.service import ShareService
+from app.users.models import User
+
+HOT_TABLES = {"document", "document_share", "document_access", "document_group_share", "group_membership", "user"}
+
+@pytest.fixture
+async def seeded(db: AsyncSession):
+    owner = await db.scalar(select(User).filter(User.email == "plan-owner@example.com"))
+    if owner is None:
+        owner, reader = User(email="plan-owner@example.com", hashed_password="x"), User(email="plan-reader@example.com", hashed_password="x")
+        member = User(email="plan-member@example.com", hashed_password="x")
+        db.add_all([owner, reader, member])
+        await db.flush()
+        group = Group(name="Plan group", owner_id=owner.id)
+        db.add(group)
+        await db.flush()
+        db.add(GroupMembership(group_id=group.id, user_id=member.id))
+        doc_ids = (await db.execute(
+            insert(Document).returning(Document.id),
+            [
+                {"title": f"Plan doc {i}", "description": "seeded for query plans", "tags": [f"t{i % 10}"], "s3_url": "url", "owner_id": owner.id}
+                for i in range(500)
+            ],
+        )).scalars().all()
+        await db.execute(
+            insert(DocumentShare),
+            [{"document_id": doc_id, "user_id": reader.id, "permission": PermissionType.READ} for doc_id in doc_ids[::5]],
+        )
+        await db.execute(
+            insert(DocumentGroupShare),
+            [{"document_id": doc_id, "group_id": group.id, "permission": PermissionType.WRITE} for doc_id in doc_ids[1::5]],
+        )
+        await db.commit()
+        await AccessIndexService.rebuild(db)
+        connection = await db.connection()
+        for table in HOT_TABLES:
+            await connection.exec_driver_sql(f'ANALYZE "{table}"')
+        await db.commit()
+    reader = await db.scalar(select(User).filter(User.email == "plan-reader@example.com"))
+    member = await db.scalar(select(User).filter(User.email == "plan-member@example.com"))
+    share = await db.scalar(select(DocumentShare).filter(DocumentShare.user_id == reader.id))
+    group_share = await db.scalar(
+        select(DocumentGroupShare)
+        .join(GroupMembership, GroupMembership.group_id == DocumentGroupShare.group_id)
+        .filter(GroupMembership.user_id == member.id)
+    )
+    return {"owner": owner, "reader": reader, "member": member, "share": share, "group_share": group_share}
+
+@pytest.fixture
+def captured(db: AsyncSession):
+    statements = []
+    sync_engine = db.bind.sync_engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(sync_engine, "before_cursor_execute", capture)
+
+def seq_scans(plan, found=None):
+    found = [] if found is None else found
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        seq_scans(child, found)
+    return found
+
+async def assert_index_only(db: AsyncSession, statements):
+    assert statements
+    connection = await db.connection()
+    await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    try:
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            plan = plan[0]["Plan"]
+            assert not seq_scans(plan), f"sequential scan in plan for:\n{statement}"
+    finally:
+        await db.rollback()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params", [
+    {},
+    {"q": "seeded"},
+    {"tags": ["t3"]},
+    {"count": "estimate"},
+])
+async def test_search_plans_use_indexes(db: AsyncSession, seeded, captured, params):
+    await DocumentService.search(db, user_id=seeded["reader"].id, **params)
+    await assert_index_only(db, captured)
+
+@pytest.mark.asyncio
+async def test_document_and_share_lookups_use_indexes(db: AsyncSession, seeded, captured):
+    share = seeded["share"]
+    await DocumentService.get(db, id=share.document_id)
+    await ShareService.get_by_id(db, id=share.id)
+    await assert_index_only(db, captured)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params", [{}, {"q": "seeded"}])
+async def test_group_visibility_plans_use_indexes(db: AsyncSession, seeded, captured, params):
+    membership_cache.pop(seeded["member"].id)
+    await DocumentService.search(db, user_id=seeded["member"].id, **params)
+    assert any("UNION" in statement for statement, _ in captured)
+    await assert_index_only(db, captured)
+
+@pytest.mark.asyncio
+async def test_permission_resolution_plans_use_indexes(db: AsyncSession, seeded, captured):
+    share, group_share, member = seeded["share"], seeded["group_share"], seeded["member"]
+    for document_id in (share.document_id, group_share.document_id):
+        document_cache.pop(document_id)
+    permission_cache.clear()
+    group_permission_cache.clear()
+    membership_cache.pop(member.id)
+    await GroupService.get_group_ids(db, member.id)
+    await PermissionResolver.resolve(db, document_id=group_share.document_id, user_id=member.id)
+    await PermissionResolver.resolve_version(db, document_id=share.document_id, user_id=share.user_id)
+    await PermissionResolver.resolve(db, document_id=share.document_id, user_id=share.user_id)
+    await assert_index_only(db, captured)
+
+@pytest.mark.asyncio
+async def test_guarded_write_plans_use_indexes(db: AsyncSession, seeded, captured, monkeypatch):
+    async def no_commit():
+        pass
+
+    # Keep the writes inside the transaction that assert_index_only rolls back.
+    monkeypatch.setattr(db, "commit", no_commit)
+    group_share = seeded["group_share"]
+    updated = await DocumentService.update(
+        db, id=group_share.document_id, obj_in=schemas.DocumentUpdate(title="Planned"), user_id=seeded["member"].id
+    )
+    assert updated is not None
+    deleted = await DocumentService.delete(db, id=group_share.document_id, owner_id=seeded["owner"].id)
+    assert deleted is not None
+    assert any(statement.lstrip().upper().startswith("UPDATE") for statement, _ in captured)
+    assert any(statement.lstrip().upper().startswith("DELETE") for statement, _ in captured)
+    await assert_index_only(db, captured)
@@ -0,0 +1,106 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.config import settings
+from app.documents.service import document_cache
+from app.db.replicas import WRITE_MARKER_COOKIE, WRITE_MARKER_HEADER, ReadRouter, Replica, read_router
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_user_writes(db: AsyncSession):
+    router = ReadRouter([db.bind])
+
+    session = await router.open_session(user_id=1)
+    assert session is not None
+    async with session:
+        assert await session.scalar(text("SELECT 1")) == 1
+
+    router.bind_user(1)
+    router.record_write()
+    assert await router.open_session(user_id=1) is None
+    other = await router.open_session(user_id=2)
+    assert other is not None
+    await other.close()
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_to_primary(db: AsyncSession):
+    broken = create_async_engine(db.bind.url.set(port=1))
+    router = ReadRouter([broken])
+
+    assert await router.open_session(user_id=1) is None
+    assert not router.replicas[0].healthy
+    await broken.dispose()
+
+@pytest.mark.asyncio
+async def test_write_marker_routes_reads_across_workers(client: AsyncClient, db: AsyncSession, monkeypatch):
+    monkeypatch.setattr(read_router, "replicas", [Replica(db.bind)])
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "replica-writer@example.com", "password": "password", "full_name": "Writer"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "replica-writer@example.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    await client.get(f"{settings.API_V1_STR}/me", headers=headers)
+
+    async def read_uses_primary(extra_headers=None) -> bool:
+        await db.rollback()
+        response = await client.get(
+            f"{settings.API_V1_STR}/documents/?ids=1", headers={**headers, **(extra_headers or {})}
+        )
+        assert response.status_code == 200
+        return db.in_transaction()
+
+    await db.commit()
+    read_router.recent_writers.clear()
+    client.cookies.clear()
+    assert not await read_uses_primary()
+
+    # The endpoint's commit fires after_commit, which marks this worker and the response.
+    response = await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Fresh", "s3_url": "url"}, headers=headers
+    )
+    marker = response.headers[WRITE_MARKER_HEADER]
+    assert response.cookies[WRITE_MARKER_COOKIE] == marker
+    assert await read_uses_primary()
+
+    # Another worker has no local record of the write; the client's marker still routes it.
+    read_router.recent_writers.clear()
+    assert await read_uses_primary()
+    client.cookies.clear()
+    assert not await read_uses_primary()
+    assert await read_uses_primary({WRITE_MARKER_HEADER: marker})
+
+@pytest.mark.asyncio
+async def test_replica_reads_do_not_fill_caches(client: AsyncClient, db: AsyncSession, monkeypatch):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "replica-cache@example.com", "password": "password", "full_name": "Cache"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "replica-cache@example.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    response = await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Cached", "s3_url": "url"}, headers=headers
+    )
+    document_id = response.json()["id"]
+
+    monkeypatch.setattr(read_router, "replicas", [Replica(db.bind)])
+    await db.commit()
+    read_router.recent_writers.clear()
+    client.cookies.clear()
+    document_cache.pop(document_id)
+    await db.rollback()
+    response = await client.get(f"{settings.API_V1_STR}/documents/{document_id}", headers=headers)
+    assert response.status_code == 200
+    assert not db.in_transaction()
+    assert document_cache.get(document_id) is None
+
+    monkeypatch.setattr(read_router, "replicas", [])
+    response = await client.get(f"{settings.API_V1_STR}/documents/{document_id}", headers=headers)
+    assert response.status_code == 200
+    assert document_cache.get(document_id) is not None
@@ -1,7 +1,16 @@
+import asyncio
+import json
+import re
+from contextlib import suppress
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import invalidation
 from app.core.config import settings
-from app.shares.models import PermissionType
+from app.shares.access import AccessIndexService
+from app.shares.models import DocumentAccess, PermissionType
+from app.shares.permissions import AccessLevel, permission_cache
 
 async def get_token(client: AsyncClient, email: str):
     await client.post(
@@ -99,3 +108,216 @@ async def test_write_permission(client: AsyncClient):
     )
     assert update_res.status_code == 200
     assert update_res.json()["title"] == "Updated by Recipient"
+
+@pytest.mark.asyncio
+async def test_revoked_share_is_not_served_from_cache(client: AsyncClient):
+    token_owner = await get_token(client, "owner3@example.com")
+    token_recipient = await get_token(client, "recipient3@example.com")
+    owner_headers = {"Authorization": f"Bearer {token_owner}"}
+    recipient_headers = {"Authorization": f"Bearer {token_recipient}"}
+
+    create_res = await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Revocable Doc", "s3_url": "url", "tags": []},
+        headers=owner_headers
+    )
+    doc_id = create_res.json()["id"]
+    recipient_id = (await client.get(f"{settings.API_V1_STR}/me", headers=recipient_headers)).json()["id"]
+
+    forbidden_res = await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=recipient_headers)
+    assert forbidden_res.status_code == 403
+
+    share_res = await client.post(
+        f"{settings.API_V1_STR}/shares/",
+        json={"document_id": doc_id, "user_id": recipient_id, "permission": PermissionType.READ},
+        headers=owner_headers
+    )
+    view_res = await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=recipient_headers)
+    assert view_res.status_code == 200
+
+    hits = permission_cache.hits
+    await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=recipient_headers)
+    assert permission_cache.hits == hits + 1
+
+    await client.delete(f"{settings.API_V1_STR}/shares/{share_res.json()['id']}", headers=owner_headers)
+    revoked_res = await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=recipient_headers)
+    assert revoked_res.status_code == 403
+
+@pytest.mark.asyncio
+async def test_invalidations_from_other_workers_are_applied(db: AsyncSession):
+    listener = asyncio.create_task(invalidation.listen(db.bind))
+    try:
+        await asyncio.sleep(0.2)
+        permission_cache.set((999999, 1), AccessLevel.WRITE)
+        permission_cache.set((999998, 1), AccessLevel.READ)
+
+        payload = json.dumps({"kind": "share", "document_id": 999999, "user_id": 1})
+        async with db.bind.connect() as conn:
+            await conn.execute(
+                select(func.pg_notify(settings.CACHE_INVALIDATION_CHANNEL, payload))
+            )
+            await conn.commit()
+
+        for _ in range(50):
+            if permission_cache.get((999999, 1)) is None:
+                break
+            await asyncio.sleep(0.05)
+        assert permission_cache.get((999999, 1)) is None
+        assert permission_cache.get((999998, 1)) == AccessLevel.READ
+    finally:
+        listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await listener
+
+@pytest.mark.asyncio
+async def test_access_index_verify_and_rebuild(client: AsyncClient, db: AsyncSession):
+    token_owner = await get_token(client, "owner4@example.com")
+    create_res = await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Indexed Doc", "s3_url": "url", "tags": []},
+        headers={"Authorization": f"Bearer {token_owner}"}
+    )
+    doc_id = create_res.json()["id"]
+    assert (await AccessIndexService.verify(db))["in_sync"]
+
+    await db.execute(delete(DocumentAccess).where(DocumentAccess.document_id == doc_id))
+    await db.commit()
+    report = await AccessIndexService.verify(db)
+    assert report["missing"] == 1
+    assert not report["in_sync"]
+
+    await AccessIndexService.rebuild(db)
+    assert (await AccessIndexService.verify(db))["in_sync"]
+
+@pytest.mark.asyncio
+async def test_batch_share_reports_per_item_results(client: AsyncClient):
+    token_owner = await get_token(client, "owner5@example.com")
+    token_other = await get_token(client, "other5@example.com")
+    token_recipient = await get_token(client, "recipient5@example.com")
+    owner_headers = {"Authorization": f"Bearer {token_owner}"}
+    recipient_headers = {"Authorization": f"Bearer {token_recipient}"}
+    recipient_id = (await client.get(f"{settings.API_V1_STR}/me", headers=recipient_headers)).json()["id"]
+
+    own_doc = (await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Batch shared", "s3_url": "url"},
+        headers=owner_headers
+    )).json()["id"]
+    foreign_doc = (await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Not mine", "s3_url": "url"},
+        headers={"Authorization": f"Bearer {token_other}"}
+    )).json()["id"]
+
+    response = await client.post(
+        f"{settings.API_V1_STR}/shares/batch",
+        json={"items": [
+            {"document_id": own_doc, "user_id": recipient_id, "permission": PermissionType.WRITE},
+            {"document_id": own_doc, "user_id": recipient_id},
+            {"document_id": foreign_doc, "user_id": recipient_id},
+            {"document_id": 999999, "user_id": recipient_id},
+            {"document_id": own_doc, "user_id": 999999},
+        ]},
+        headers=owner_headers
+    )
+    assert response.status_code == 200
+    assert [r["status_code"] for r in response.json()] == [201, 400, 403, 404, 404]
+
+    update_res = await client.put(
+        f"{settings.API_V1_STR}/documents/{own_doc}",
+        json={"title": "Edited via batch share"},
+        headers=recipient_headers
+    )
+    assert update_res.status_code == 200
+
+@pytest.mark.asyncio
+async def test_search_cache_follows_writes_and_shares(client: AsyncClient):
+    owner_headers = {"Authorization": f"Bearer {await get_token(client, 'owner6@example.com')}"}
+    reader_headers = {"Authorization": f"Bearer {await get_token(client, 'reader6@example.com')}"}
+    reader_id = (await client.get(f"{settings.API_V1_STR}/me", headers=reader_headers)).json()["id"]
+    url = f"{settings.API_V1_STR}/documents/search/?q=Quarterly&mode=ilike"
+
+    doc_id = (await client.post(
+        f"{settings.API_V1_STR}/documents/",
+        json={"title": "Quarterly report", "s3_url": "url"},
+        headers=owner_headers
+    )).json()["id"]
+
+    response = await client.get(url, headers=reader_headers)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["total"] == 0
+    response = await client.get(url, headers=reader_headers)
+    assert response.headers["x-cache"] == "HIT"
+    assert (await client.get(url, headers=owner_headers)).headers["x-cache"] == "MISS"
+
+    await client.post(
+        f"{settings.API_V1_STR}/shares/",
+        json={"document_id": doc_id, "user_id": reader_id},
+        headers=owner_headers
+    )
+    response = await client.get(url, headers=reader_headers)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["total"] == 1
+    assert (await client.get(url, headers=owner_headers)).headers["x-cache"] == "HIT"
+
+    await client.put(
+        f"{settings.API_V1_STR}/documents/{doc_id}",
+        json={"title": "Quarterly report (final)"},
+        headers=owner_headers
+    )
+    response = await client.get(url, headers=reader_headers)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["items"][0]["title"] == "Quarterly report (final)"
+
+    text = (await client.get("/metrics")).text
+    hits = re.search(r'^cache_hits\{cache="search"\} (\S+)$', text, re.MULTILINE)
+    cached = re.search(r'^cache_bytes\{cache="search"\} (\S+)$', text, re.MULTILINE)
+    assert float(hits.group(1)) >= 2
+    assert 0 < float(cached.group(1)) <= settings.SEARCH_CACHE_MAX_BYTES
+
+@pytest.mark.asyncio
+async def test_batch_share_reports_rows_lost_to_races(client: AsyncClient, monkeypatch):
+    from app.shares.service import ShareService
+    from app.users.service import UserService
+
+    owner_headers = {"Authorization": f"Bearer {await get_token(client, 'owner11@example.com')}"}
+    recipient_headers = {"Authorization": f"Bearer {await get_token(client, 'recipient11@example.com')}"}
+    recipient_id = (await client.get(f"{settings.API_V1_STR}/me", headers=recipient_headers)).json()["id"]
+    doc_id = (await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Raced", "s3_url": "url"}, headers=owner_headers
+    )).json()["id"]
+    other_doc = (await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Raced too", "s3_url": "url"}, headers=owner_headers
+    )).json()["id"]
+    await client.post(
+        f"{settings.API_V1_STR}/shares/",
+        json={"document_id": doc_id, "user_id": recipient_id},
+        headers=owner_headers
+    )
+
+    # Validation runs before a concurrent share and a recipient deletion land.
+    get_existing_pairs, get_existing_ids = ShareService.get_existing_pairs, UserService.get_existing_ids
+    calls = []
+
+    async def stale_pairs(db, pairs):
+        calls.append("pairs")
+        return set() if calls.count("pairs") == 1 else await get_existing_pairs(db, pairs=pairs)
+
+    async def stale_ids(db, ids):
+        calls.append("ids")
+        return set(ids) if calls.count("ids") == 1 else await get_existing_ids(db, ids=ids)
+
+    monkeypatch.setattr(ShareService, "get_existing_pairs", staticmethod(stale_pairs))
+    monkeypatch.setattr(UserService, "get_existing_ids", staticmethod(stale_ids))
+    response = await client.post(
+        f"{settings.API_V1_STR}/shares/batch",
+        json={"items": [
+            {"document_id": doc_id, "user_id": recipient_id},
+            {"document_id": other_doc, "user_id": 999999},
+            {"document_id": other_doc, "user_id": recipient_id},
+        ]},
+        headers=owner_headers
+    )
+    assert response.status_code == 200
+    assert [r["status_code"] for r in response.json()] == [400, 404, 201]
+    assert response.json()[1]["detail"] == "User not found"
@@ -0,0 +1,149 @@
+import logging
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+
+@pytest.fixture
+def statements(db: AsyncSession):
+    executed = []
+    sync_engine = db.bind.sync_engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    yield executed
+    event.remove(sync_engine, "before_cursor_execute", capture)
+
+async def get_headers(client: AsyncClient, email: str):
+    await client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": email, "password": "password", "full_name": f"User {email}"},
+    )
+    login_res = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    await client.get(f"{settings.API_V1_STR}/me", headers=headers)
+    return headers
+
+async def counted(statements, request):
+    statements.clear()
+    response = await request
+    return response, list(statements)
+
+@pytest.mark.asyncio
+async def test_write_endpoints_use_single_statement_writes(client: AsyncClient, statements):
+    owner = await get_headers(client, "writes-owner@example.com")
+    reader = await get_headers(client, "writes-reader@example.com")
+    reader_id = (await client.get(f"{settings.API_V1_STR}/me", headers=reader)).json()["id"]
+
+    response, executed = await counted(statements, client.post(
+        f"{settings.API_V1_STR}/users",
+        json={"email": "writes-new@example.com", "password": "password"},
+    ))
+    assert response.status_code == 200
+    assert response.json()["created_at"]
+    assert len(executed) == 2, executed
+
+    response, executed = await counted(statements, client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Written once", "s3_url": "url"}, headers=owner
+    ))
+    assert response.status_code == 200
+    document = response.json()
+    assert document["created_at"] and document["updated_at"]
+    assert len(executed) == 3, executed
+
+    response, executed = await counted(statements, client.put(
+        f"{settings.API_V1_STR}/documents/{document['id']}", json={"title": "Written twice"}, headers=owner
+    ))
+    assert response.status_code == 200
+    assert response.json()["title"] == "Written twice"
+    assert response.json()["updated_at"] >= document["updated_at"]
+    assert len(executed) == 2, executed
+    assert executed[0].startswith("UPDATE document") and "updated_at" in executed[0]
+
+    await client.get(f"{settings.API_V1_STR}/documents/{document['id']}", headers=owner)
+    response, executed = await counted(statements, client.post(
+        f"{settings.API_V1_STR}/shares/",
+        json={"document_id": document["id"], "user_id": reader_id},
+        headers=owner
+    ))
+    assert response.status_code == 200
+    assert len(executed) == 3, executed
+
+    response, executed = await counted(statements, client.post(
+        f"{settings.API_V1_STR}/groups/", json={"name": "Writers"}, headers=owner
+    ))
+    assert response.status_code == 200
+    assert len(executed) == 3, executed
+
+    response, executed = await counted(statements, client.put(
+        f"{settings.API_V1_STR}/me", json={"full_name": "Renamed"}, headers=reader
+    ))
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Renamed"
+    assert len(executed) == 2, executed
+
+    response, executed = await counted(statements, client.delete(
+        f"{settings.API_V1_STR}/documents/{document['id']}", headers=owner
+    ))
+    assert response.status_code == 200
+    assert len(executed) == 2, executed
+
+@pytest.mark.asyncio
+async def test_guarded_update_reports_missing_and_forbidden(client: AsyncClient):
+    owner = await get_headers(client, "guard-owner@example.com")
+    other = await get_headers(client, "guard-other@example.com")
+    doc_id = (await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": "Guarded", "s3_url": "url"}, headers=owner
+    )).json()["id"]
+
+    assert (await client.put(
+        f"{settings.API_V1_STR}/documents/{doc_id}", json={"title": "Nope"}, headers=other
+    )).status_code == 403
+    assert (await client.delete(f"{settings.API_V1_STR}/documents/{doc_id}", headers=other)).status_code == 403
+    assert (await client.put(
+        f"{settings.API_V1_STR}/documents/999999", json={"title": "Nope"}, headers=owner
+    )).status_code == 404
+    assert (await client.delete(f"{settings.API_V1_STR}/documents/999999", headers=owner)).status_code == 404
+    response = await client.get(f"{settings.API_V1_STR}/documents/{doc_id}", headers=owner)
+    assert response.json()["title"] == "Guarded"
+
+@pytest.mark.asyncio
+async def test_read_endpoints_stay_within_statement_budgets(client: AsyncClient, assert_max_statements):
+    owner = await get_headers(client, "budget-owner@example.com")
+    reader = await get_headers(client, "budget-reader@example.com")
+    reader_id = (await client.get(f"{settings.API_V1_STR}/me", headers=reader)).json()["id"]
+    doc_ids = [(await client.post(
+        f"{settings.API_V1_STR}/documents/", json={"title": f"Budget doc {i}", "s3_url": "url"}, headers=owner
+    )).json()["id"] for i in range(5)]
+    for doc_id in doc_ids:
+        await client.post(
+            f"{settings.API_V1_STR}/shares/", json={"document_id": doc_id, "user_id": reader_id}, headers=owner
+        )
+
+    assert_max_statements(await client.get(f"{settings.API_V1_STR}/me", headers=reader), 0)
+    assert_max_statements(await client.get(f"{settings.API_V1_STR}/documents/{doc_ids[0]}", headers=reader), 2)
+    response = await client.get(f"{settings.API_V1_STR}/documents/{doc_ids[0]}", headers=reader)
+    assert_max_statements(response, 1)
+    assert response.headers["x-db-time"].endswith("ms")
+    assert_max_statements(await client.get(
+        f"{settings.API_V1_STR}/documents/?" + "&".join(f"ids={i}" for i in doc_ids), headers=reader
+    ), 2)
+    response = await client.get(f"{settings.API_V1_STR}/documents/search/?q=Budget&mode=ilike&limit=5", headers=reader)
+    assert len(response.json()["items"]) == 5
+    assert_max_statements(response, 3)
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_redacted_parameters(db: AsyncSession, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_SECONDS", 0.0)
+    caplog.set_level(logging.WARNING, logger="app.db.slow_query")
+    await db.execute(text("SELECT :secret AS value"), {"secret": "hunter2"})
+    record = next(r for r in caplog.records if r.name == "app.db.slow_query")
+    assert "SELECT" in record.getMessage()
+    assert "hunter2" not in record.getMessage()
+    assert "str" in record.getMessage()